@@ -3,10 +3,13 @@
 """
 from __future__ import annotations
 
+import math
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
+
+from src.day1.exeptions.exceptions import InvalidOperationError
 
 
 class AccountStatus(Enum):
@@ -25,11 +28,48 @@ class Currency(Enum):
     CNY = "CNY"
 
 
-@dataclass
+# Строковые значения Enum для форматирования — словарь вместо .value на каждый вызов
+STATUS_STR: Dict[AccountStatus, str] = {s: s.value for s in AccountStatus}
+CURRENCY_STR: Dict[Currency, str] = {c: c.value for c in Currency}
+# Порядковый номер валюты — для плоских таблиц (например, матрицы курсов)
+CURRENCY_INDEX: Dict[Currency, int] = {c: i for i, c in enumerate(Currency)}
+
+# Денежные суммы храним целыми числами в минимальных единицах валюты (копейки/центы):
+# целочисленная арифметика без ошибок округления float
+Money = int
+MINOR_UNITS = 100
+
+
+def to_minor(amount: float) -> Money:
+    """Перевести сумму в минимальные единицы (с округлением до ближайшей).
+    NaN, бесконечность и суммы, переполняющие float, — InvalidOperationError.
+    """
+    try:
+        value = float(amount) * MINOR_UNITS
+    except OverflowError:  # целое, не помещающееся во float
+        value = math.inf
+    if not math.isfinite(value):
+        raise InvalidOperationError("Сумма должна быть конечным числом.")
+    return round(value)
+
+
+def format_minor(amount: Money) -> str:
+    """Строка вида '-12.05' из суммы в минимальных единицах (без промежуточного float)."""
+    sign = "-" if amount < 0 else ""
+    units, cents = divmod(abs(amount), MINOR_UNITS)
+    return f"{sign}{units}.{cents:02d}"
+
+
+@dataclass(frozen=True, slots=True)
 class Owner:
-    """Простая модель владельца счёта."""
+    """Простая модель владельца счёта (неизменяемая, поэтому name_lower не устаревает)."""
     name: str
     email: str
+    # Имя в нижнем регистре — для поиска без повторного lower() на каждый запрос
+    name_lower: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "name_lower", self.name.lower())
 
 
 class AbstractAccount(ABC):
@@ -38,20 +78,34 @@ class AbstractAccount(ABC):
     Содержит идентификатор, владельца, защищённый баланс и статус.
     """
 
+    # Фиксированный набор полей: без __dict__ на каждый экземпляр
+    __slots__ = ("id", "owner", "_minor", "status", "currency", "_str_cache")
+
     def __init__(self, account_id: str, owner: Owner, balance: float = 0.0,
                  status: AccountStatus = AccountStatus.ACTIVE, currency: Currency = Currency.RUB) -> None:
         # Уникальный идентификатор счёта (строка)
         self.id: str = account_id
         # Данные владельца
         self.owner: Owner = owner
-        # Защищённый баланс (начальное значение >= 0)
-        self._balance: float = float(balance) if balance is not None else 0.0
-        if self._balance < 0:
-            self._balance = 0.0
+        # Защищённый баланс в минимальных единицах (начальное значение >= 0)
+        self._minor: Money = to_minor(balance) if balance is not None else 0
+        if self._minor < 0:
+            self._minor = 0
         # Статус счёта
         self.status: AccountStatus = status
         # Валюта счёта
         self.currency: Currency = currency
+        # Кэш строкового представления: (состояние, строка)
+        self._str_cache: Optional[Tuple[tuple, str]] = None
+
+    @property
+    def _balance(self) -> float:
+        """Баланс в основных единицах валюты (хранится в self._minor)."""
+        return self._minor / MINOR_UNITS
+
+    @_balance.setter
+    def _balance(self, value: float) -> None:
+        self._minor = to_minor(value)
 
     # Абстрактные методы операций
     @abstractmethod
@@ -67,15 +121,31 @@ class AbstractAccount(ABC):
         """Возвращает словарь с информацией о счёте."""
 
     # toString
+    def _str_state(self) -> tuple:
+        """Поля, от которых зависит __str__; подклассы дополняют своими."""
+        return (self.id, self.owner, self._minor, self.status, self.currency)
+
+    def _format_suffix(self) -> str:
+        """Дополнительная часть строки для подклассов ('' — без неё)."""
+        return ""
+
     def __str__(self) -> str:
+        # Строка пересобирается, только если изменилось что-то из _str_state()
+        state = self._str_state()
+        cache = self._str_cache
+        if cache is not None and cache[0] == state:
+            return cache[1]
         # Тип счёта — имя класса
         account_type = self.__class__.__name__
         # Имя клиента
         client = self.owner.name if self.owner else "Unknown"
         # Последние 4 символа идентификатора
         last4 = str(self.id)[-4:] if self.id else "????"
-        # Статус
-        status = self.status.value if isinstance(self.status, AccountStatus) else str(self.status)
-        # Баланс и валюта
-        cur = self.currency.value if isinstance(self.currency, Currency) else str(self.currency)
-        return f"{account_type} | {client} | ****{last4} | {status} | {self._balance:.2f} {cur}"
+        # Статус, баланс и валюта (типы проверены при создании счёта)
+        text = (f"{account_type} | {client} | ****{last4} | {STATUS_STR[self.status]} | "
+                f"{format_minor(self._minor)} {CURRENCY_STR[self.currency]}")
+        suffix = self._format_suffix()
+        if suffix:
+            text = f"{text} | {suffix}"
+        self._str_cache = (state, text)
+        return text
@@ -3,10 +3,19 @@
 """
 from __future__ import annotations
 
-import uuid
-from typing import Any, Dict
+import os
+from typing import Any, Dict, List
 
-from src.day1.model.abstract_account import AbstractAccount, AccountStatus, Currency, Owner
+from src.day1.model.abstract_account import (
+    CURRENCY_STR,
+    STATUS_STR,
+    AbstractAccount,
+    AccountStatus,
+    Currency,
+    Money,
+    Owner,
+    to_minor,
+)
 from src.day1.exeptions.exceptions import (
     AccountClosedError,
     AccountFrozenError,
@@ -14,10 +23,38 @@ from src.day1.exeptions.exceptions import (
     InsufficientFundsError,
 )
 
+# Статусы — синглтоны Enum, поэтому в горячих проверках сравниваем по `is`
+_ACTIVE = AccountStatus.ACTIVE
+# Ошибка для неактивного статуса — нужна только на неуспешном пути
+_STATUS_ERR = {
+    AccountStatus.FROZEN: (AccountFrozenError, "Счёт заморожен. Операция запрещена."),
+    AccountStatus.CLOSED: (AccountClosedError, "Счёт закрыт. Операция запрещена."),
+}
+
+# Пул коротких случайных id: один вызов os.urandom на пачку из _ID_BATCH id
+_ID_BATCH = 32
+_ID_POOL: List[str] = []
+
+
+def _next_id() -> str:
+    """Случайный 8-символьный hex id (как uuid4().hex[:8], но без объекта UUID на каждый счёт)."""
+    if not _ID_POOL:
+        buf = os.urandom(4 * _ID_BATCH)
+        _ID_POOL.extend(buf[i:i + 4].hex() for i in range(0, len(buf), 4))
+    return _ID_POOL.pop()
+
+
+# После fork() пул унаследовался бы дочерним процессом, и оба процесса раздали бы
+# одни и те же id — в дочернем процессе пул сбрасываем (на Windows fork нет)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_ID_POOL.clear)
+
 
 class BankAccount(AbstractAccount):
     """Конкретный тип банковского счёта."""
 
+    __slots__ = ()
+
     def __init__(
         self,
         owner: Owner,
@@ -26,9 +63,9 @@ class BankAccount(AbstractAccount):
         status: AccountStatus = AccountStatus.ACTIVE,
         currency: Currency = Currency.RUB,
     ) -> None:
-        # Если номер счёта не передали — генерируем короткий UUID (8 символов)
+        # Если номер счёта не передали — генерируем короткий случайный id (8 hex-символов)
         if not account_id:
-            account_id = uuid.uuid4().hex[:8]
+            account_id = _next_id()
         # Инициализируем базовый класс
         super().__init__(account_id=account_id, owner=owner, balance=balance, status=status, currency=currency)
         # Простейшая валидация входных данных
@@ -39,42 +76,76 @@ class BankAccount(AbstractAccount):
 
     # Вспомогательная проверка статуса
     def _ensure_active(self) -> None:
-        if self.status == AccountStatus.FROZEN:
-            raise AccountFrozenError("Счёт заморожен. Операция запрещена.")
-        if self.status == AccountStatus.CLOSED:
-            raise AccountClosedError("Счёт закрыт. Операция запрещена.")
+        if self.status is _ACTIVE:
+            return
+        err = _STATUS_ERR.get(self.status)
+        if err is not None:
+            raise err[0](err[1])
 
     # Вспомогательная проверка суммы
     @staticmethod
     def _validate_amount(amount: float) -> float:
+        # Быстрый путь: обычное положительное число (type() is — без обхода MRO, как у isinstance)
+        if type(amount) is float and amount > 0.0:
+            return amount
         try:
             value = float(amount)
-        except (TypeError, ValueError):
+        except (TypeError, ValueError, OverflowError):
             raise InvalidOperationError("Сумма должна быть числом.")
         if value <= 0:
             raise InvalidOperationError("Сумма должна быть положительной и больше нуля.")
         return value
 
+    # Проверка суммы с переводом в минимальные единицы (общая для всех типов счетов)
+    @classmethod
+    def _validate_minor(cls, amount: float) -> Money:
+        # Быстрый путь для int/float: без _validate_amount (to_minor отсекает inf и переполнение)
+        if type(amount) is float or type(amount) is int:
+            if not amount > 0:  # отсекает и NaN
+                raise InvalidOperationError("Сумма должна быть положительной и больше нуля.")
+            value = to_minor(amount)
+        else:
+            value = to_minor(cls._validate_amount(amount))
+        if value <= 0:
+            raise InvalidOperationError("Сумма меньше минимальной денежной единицы.")
+        return value
+
+    # Правило списания в минимальных единицах (сумма и статус уже проверены);
+    # подклассы переопределяют его своими ограничениями
+    def _debit_minor(self, value: Money) -> None:
+        if value > self._minor:
+            raise InsufficientFundsError("Недостаточно средств.")
+        self._minor -= value
+
     def deposit(self, amount: float) -> None:
         """Пополнение счёта."""
         self._ensure_active()
-        value = self._validate_amount(amount)
-        self._balance += value
+        value = self._validate_minor(amount)
+        self._minor += value
 
     def withdraw(self, amount: float) -> None:
         """Снятие со счёта."""
         self._ensure_active()
-        value = self._validate_amount(amount)
-        if value > self._balance:
-            raise InsufficientFundsError("Недостаточно средств.")
-        self._balance -= value
+        self._debit_minor(self._validate_minor(amount))
+
+    # --- Доверенный путь для процессора транзакций: сумма уже переведена в минимальные
+    # единицы и проверена (> 0), поэтому здесь только статус и правило списания ---
+    def _deposit_fast(self, value: Money) -> None:
+        if self.status is not _ACTIVE:
+            self._ensure_active()
+        self._minor += value
+
+    def _withdraw_fast(self, value: Money) -> None:
+        if self.status is not _ACTIVE:
+            self._ensure_active()
+        self._debit_minor(value)
 
     def get_account_info(self) -> Dict[str, Any]:
         """Возвращает простую информацию о счёте."""
         return {
             "id": self.id,
             "owner": self.owner.name,
-            "status": self.status.value,
+            "status": STATUS_STR[self.status],
             "balance": self._balance,
-            "currency": self.currency.value,
+            "currency": CURRENCY_STR[self.currency],
         }
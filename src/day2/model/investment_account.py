@@ -3,19 +3,40 @@ InvestmentAccount — инвестиционный счёт с портфеле
 """
 from __future__ import annotations
 
-from typing import Any, Dict, Mapping
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
 
 from src.day1.model.bank_account import BankAccount
 from src.day1.model.abstract_account import AccountStatus, Currency, Owner
 from src.day1.exeptions.exceptions import InvalidOperationError
 
+_ACTIVE = AccountStatus.ACTIVE
+
+# Фиксированный порядок активов для пакетных расчётов
+ASSET_KEYS: Tuple[str, str, str] = ("stocks", "bonds", "etf")
+
+
+def project_balances(
+    balances: Sequence[float],
+    shares: Sequence[Tuple[float, float, float]],
+    rates: Tuple[float, float, float],
+) -> List[float]:
+    """Пакетный прогноз: balances[i] * (1 + shares[i] · rates) за один проход.
+    shares и rates — в порядке ASSET_KEYS.
+    """
+    r0, r1, r2 = rates
+    return [b * (1.0 + s0 * r0 + s1 * r1 + s2 * r2) for b, (s0, s1, s2) in zip(balances, shares)]
+
 
 class InvestmentAccount(BankAccount):
     """Инвестиционный счёт.
     - portfolio: распределение по активам (stocks, bonds, etf) в долях 0..1, сумма <= 1
+      (только чтение; менять — через set_portfolio)
     - project_yearly_growth(): прогнозирует баланс через год по простым средним ставкам
     """
 
+    __slots__ = ("_portfolio", "_shares")
+
     # Простейшие базовые ставки годовой доходности для типов активов
     DEFAULT_RATES: Dict[str, float] = {
         "stocks": 0.08,  # 8% годовых
@@ -34,7 +55,14 @@ class InvestmentAccount(BankAccount):
     ) -> None:
         super().__init__(owner=owner, account_id=account_id, balance=balance, status=status, currency=currency)
         # Устанавливаем портфель
-        self.portfolio: Dict[str, float] = {
+        self.set_portfolio(portfolio)
+
+    def set_portfolio(self, portfolio: Mapping[str, float] | None) -> None:
+        """Заменить портфель (неуказанные активы — 0). Единственный способ изменить портфель:
+        держит в синхронизации словарь портфеля и кортеж долей self._shares для расчётов.
+        Портфель не меняется, если данные некорректны.
+        """
+        new_portfolio: Dict[str, float] = {
             "stocks": 0.0,
             "bonds": 0.0,
             "etf": 0.0,
@@ -42,7 +70,7 @@ class InvestmentAccount(BankAccount):
         if portfolio is not None:
             # Копируем только поддерживаемые ключи
             for k, v in portfolio.items():
-                if k not in self.portfolio:
+                if k not in new_portfolio:
                     raise InvalidOperationError("Неизвестный тип актива в портфеле.")
                 try:
                     val = float(v)
@@ -50,11 +78,18 @@ class InvestmentAccount(BankAccount):
                     raise InvalidOperationError("Доля актива должна быть числом.")
                 if val < 0:
                     raise InvalidOperationError("Доля актива не может быть отрицательной.")
-                self.portfolio[k] = val
+                new_portfolio[k] = val
         # Проверяем сумму долей
-        total = sum(self.portfolio.values())
+        total = sum(new_portfolio.values())
         if total > 1.0 + 1e-9:
             raise InvalidOperationError("Сумма долей в портфеле не должна превышать 1.0.")
+        self._portfolio = new_portfolio
+        self._shares: Tuple[float, float, float] = (new_portfolio["stocks"], new_portfolio["bonds"], new_portfolio["etf"])
+
+    @property
+    def portfolio(self) -> Mapping[str, float]:
+        """Доли портфеля (представление только для чтения)."""
+        return MappingProxyType(self._portfolio)
 
     def withdraw(self, amount: float) -> None:
         """Переопределяем для полиморфизма: правила как в базовом классе."""
@@ -69,14 +104,10 @@ class InvestmentAccount(BankAccount):
         })
         return info
 
-    def project_yearly_growth(self, rates: Mapping[str, float] | None = None) -> float:
-        """Возвращает прогнозный баланс через год по взвешенной доходности портфеля.
-        rates — словарь ставок для ключей stocks/bonds/etf. Если не передан, берём DEFAULT_RATES.
-        """
-        if self.status != AccountStatus.ACTIVE:
-            # Для простоты считаем, что роста нет в неактивном состоянии
-            return self._balance
-        rates_map = dict(self.DEFAULT_RATES)
+    @classmethod
+    def rates_vector(cls, rates: Mapping[str, float] | None = None) -> Tuple[float, float, float]:
+        """Ставки в порядке ASSET_KEYS: DEFAULT_RATES, переопределённые значениями из rates."""
+        rates_map = dict(cls.DEFAULT_RATES)
         if rates:
             for k, v in rates.items():
                 if k in rates_map:
@@ -84,17 +115,43 @@ class InvestmentAccount(BankAccount):
                         rates_map[k] = float(v)
                     except (TypeError, ValueError):
                         raise InvalidOperationError("Ставка должна быть числом.")
-        # Считаем взвешенную ставку
+        return rates_map["stocks"], rates_map["bonds"], rates_map["etf"]
+
+    def shares_vector(self) -> Tuple[float, float, float]:
+        """Доли портфеля в порядке ASSET_KEYS."""
+        return self._shares
+
+    def project_yearly_growth(self, rates: Mapping[str, float] | None = None) -> float:
+        """Возвращает прогнозный баланс через год по взвешенной доходности портфеля.
+        rates — словарь ставок для ключей stocks/bonds/etf. Если не передан, берём DEFAULT_RATES.
+        """
+        if self.status is not _ACTIVE:
+            # Для простоты считаем, что роста нет в неактивном состоянии
+            return self._balance
+        if not rates:
+            # Быстрый путь: базовые ставки класса без копирования словаря и без цикла
+            # (читаем self.DEFAULT_RATES — подкласс может переопределить ставки)
+            d = self.DEFAULT_RATES
+            s, b, e = self._shares
+            return self._balance * (1.0 + s * d.get("stocks", 0.0) + b * d.get("bonds", 0.0) + e * d.get("etf", 0.0))
+        # Считаем взвешенную ставку, подставляя переопределённые ставки на лету
         weighted_rate = 0.0
-        for k, share in self.portfolio.items():
-            weighted_rate += share * rates_map.get(k, 0.0)
+        for k, share in zip(ASSET_KEYS, self._shares):
+            if k in rates:
+                try:
+                    rate = float(rates[k])
+                except (TypeError, ValueError):
+                    raise InvalidOperationError("Ставка должна быть числом.")
+            else:
+                rate = self.DEFAULT_RATES.get(k, 0.0)
+            weighted_rate += share * rate
         # Остаток (1 - сумма долей) считаем как кэш без доходности
         projected = self._balance * (1.0 + weighted_rate)
         return projected
 
-    def __str__(self) -> str:
-        base = super().__str__()
-        s = self.portfolio.get("stocks", 0.0)
-        b = self.portfolio.get("bonds", 0.0)
-        e = self.portfolio.get("etf", 0.0)
-        return f"{base} | portfolio: stocks={s:.2f}, bonds={b:.2f}, etf={e:.2f}"
+    def _str_state(self) -> tuple:
+        return super()._str_state() + self._shares
+
+    def _format_suffix(self) -> str:
+        s, b, e = self._shares
+        return f"portfolio: stocks={s:.2f}, bonds={b:.2f}, etf={e:.2f}"
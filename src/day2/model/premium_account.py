@@ -6,9 +6,11 @@ from __future__ import annotations
 from typing import Any, Dict
 
 from src.day1.model.bank_account import BankAccount
-from src.day1.model.abstract_account import AccountStatus, Currency, Owner
+from src.day1.model.abstract_account import MINOR_UNITS, AccountStatus, Currency, Money, Owner, to_minor
 from src.day1.exeptions.exceptions import InvalidOperationError, InsufficientFundsError
 
+_ACTIVE = AccountStatus.ACTIVE
+
 
 class PremiumAccount(BankAccount):
     """Премиальный счёт.
@@ -16,6 +18,8 @@ class PremiumAccount(BankAccount):
     - withdraw_fee_fixed — фиксированная комиссия за каждое снятие
     """
 
+    __slots__ = ("_overdraft_minor", "_fee_minor")
+
     def __init__(
         self,
         owner: Owner,
@@ -29,30 +33,54 @@ class PremiumAccount(BankAccount):
         super().__init__(owner=owner, account_id=account_id, balance=balance, status=status, currency=currency)
         # Валидация лимита овердрафта
         try:
-            self.overdraft_limit = float(overdraft_limit)
+            limit = float(overdraft_limit)
         except (TypeError, ValueError):
             raise InvalidOperationError("overdraft_limit должен быть числом.")
-        if self.overdraft_limit < 0:
+        if limit < 0:
             raise InvalidOperationError("overdraft_limit не может быть отрицательным.")
+        self.overdraft_limit = limit
         # Валидация фиксированной комиссии
         try:
-            self.withdraw_fee_fixed = float(withdraw_fee_fixed)
+            fee = float(withdraw_fee_fixed)
         except (TypeError, ValueError):
             raise InvalidOperationError("withdraw_fee_fixed должен быть числом.")
-        if self.withdraw_fee_fixed < 0:
+        if fee < 0:
             raise InvalidOperationError("withdraw_fee_fixed не может быть отрицательной.")
+        self.withdraw_fee_fixed = fee
+
+    # Лимит и комиссия хранятся в минимальных единицах, как и баланс
+    @property
+    def overdraft_limit(self) -> float:
+        return self._overdraft_minor / MINOR_UNITS
+
+    @overdraft_limit.setter
+    def overdraft_limit(self, value: float) -> None:
+        self._overdraft_minor = to_minor(value)
+
+    @property
+    def withdraw_fee_fixed(self) -> float:
+        return self._fee_minor / MINOR_UNITS
+
+    @withdraw_fee_fixed.setter
+    def withdraw_fee_fixed(self, value: float) -> None:
+        self._fee_minor = to_minor(value)
 
     def withdraw(self, amount: float) -> None:
         """Снятие: разрешаем уходить в минус в пределах overdraft_limit.
         Комиссия списывается дополнительно к сумме.
         """
-        self._ensure_active()
-        value = self._validate_amount(amount)
-        total_debit = value + self.withdraw_fee_fixed
+        # Статус — проверкой идентичности; помощник — только для выбора исключения
+        if self.status is not _ACTIVE:
+            self._ensure_active()
+        value = self._validate_minor(amount)
+        self._debit_minor(value)
+
+    def _debit_minor(self, value: Money) -> None:
+        total_debit = value + self._fee_minor
         # Проверяем, что после списания баланс не меньше допустимого (минус лимит)
-        if self._balance - total_debit < -self.overdraft_limit:
+        if self._minor - total_debit < -self._overdraft_minor:
             raise InsufficientFundsError("Превышен лимит овердрафта.")
-        self._balance -= total_debit
+        self._minor -= total_debit
 
     def get_account_info(self) -> Dict[str, Any]:
         info = super().get_account_info()
@@ -62,6 +90,8 @@ class PremiumAccount(BankAccount):
         })
         return info
 
-    def __str__(self) -> str:
-        base = super().__str__()
-        return f"{base} | overdraft={self.overdraft_limit:.2f} | fee={self.withdraw_fee_fixed:.2f}"
+    def _str_state(self) -> tuple:
+        return super()._str_state() + (self._overdraft_minor, self._fee_minor)
+
+    def _format_suffix(self) -> str:
+        return f"overdraft={self.overdraft_limit:.2f} | fee={self.withdraw_fee_fixed:.2f}"
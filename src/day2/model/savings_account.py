@@ -6,9 +6,11 @@ from __future__ import annotations
 from typing import Any, Dict
 
 from src.day1.model.bank_account import BankAccount
-from src.day1.model.abstract_account import AccountStatus, Currency, Owner
+from src.day1.model.abstract_account import MINOR_UNITS, AccountStatus, Currency, Money, Owner, to_minor
 from src.day1.exeptions.exceptions import InvalidOperationError, InsufficientFundsError
 
+_ACTIVE = AccountStatus.ACTIVE
+
 
 class SavingsAccount(BankAccount):
     """Накопительный счёт.
@@ -17,6 +19,8 @@ class SavingsAccount(BankAccount):
     - apply_monthly_interest() — начисляет проценты на текущий баланс
     """
 
+    __slots__ = ("_min_minor", "monthly_interest_rate")
+
     def __init__(
         self,
         owner: Owner,
@@ -30,11 +34,12 @@ class SavingsAccount(BankAccount):
         super().__init__(owner=owner, account_id=account_id, balance=balance, status=status, currency=currency)
         # Валидация минимального остатка
         try:
-            self.min_balance = float(min_balance)
+            min_value = float(min_balance)
         except (TypeError, ValueError):
             raise InvalidOperationError("min_balance должен быть числом.")
-        if self.min_balance < 0:
+        if min_value < 0:
             raise InvalidOperationError("min_balance не может быть отрицательным.")
+        self.min_balance = min_value
         # Валидация процентной ставки (разрешаем 0 и положительные значения)
         try:
             self.monthly_interest_rate = float(monthly_interest_rate)
@@ -43,25 +48,41 @@ class SavingsAccount(BankAccount):
         if self.monthly_interest_rate < 0:
             raise InvalidOperationError("monthly_interest_rate не может быть отрицательным.")
 
+    # Минимальный остаток хранится в минимальных единицах, как и баланс
+    @property
+    def min_balance(self) -> float:
+        return self._min_minor / MINOR_UNITS
+
+    @min_balance.setter
+    def min_balance(self, value: float) -> None:
+        self._min_minor = to_minor(value)
+
     def withdraw(self, amount: float) -> None:
         """Снятие: нельзя опускаться ниже min_balance."""
-        value = self._validate_amount(amount)
-        # Проверка статуса как в базовом классе
-        self._ensure_active()
+        value = self._validate_minor(amount)
+        # Проверка статуса как в базовом классе (помощник — только для выбора исключения)
+        if self.status is not _ACTIVE:
+            self._ensure_active()
+        self._debit_minor(value)
+
+    def _debit_minor(self, value: Money) -> None:
         # Проверяем остаток после снятия
-        if self._balance - value < self.min_balance:
+        if self._minor - value < self._min_minor:
             raise InsufficientFundsError("Нельзя опускаться ниже минимального остатка.")
-        self._balance -= value
+        self._minor -= value
 
-    def apply_monthly_interest(self) -> None:
+    def apply_monthly_interest(self) -> bool:
         """Начисляем проценты на весь текущий баланс.
         Проценты не начисляются, если счёт заморожен или закрыт.
+        Возвращает True, если проценты начислены.
         """
-        if self.status != AccountStatus.ACTIVE:
-            return
+        # Проверка идентичности статуса дешевле сравнения ставки — её первой
+        if self.status is not _ACTIVE:
+            return False
         if self.monthly_interest_rate <= 0:
-            return
-        self._balance += self._balance * self.monthly_interest_rate
+            return False
+        self._minor += round(self._minor * self.monthly_interest_rate)
+        return True
 
     def get_account_info(self) -> Dict[str, Any]:
         info = super().get_account_info()
@@ -71,6 +92,8 @@ class SavingsAccount(BankAccount):
         })
         return info
 
-    def __str__(self) -> str:
-        base = super().__str__()
-        return f"{base} | min={self.min_balance:.2f} | rate={self.monthly_interest_rate:.4f}/m"
+    def _str_state(self) -> tuple:
+        return super()._str_state() + (self._min_minor, self.monthly_interest_rate)
+
+    def _format_suffix(self) -> str:
+        return f"min={self.min_balance:.2f} | rate={self.monthly_interest_rate:.4f}/m"
@@ -1,58 +1,100 @@
 from __future__ import annotations
 
+import hashlib
+import hmac
+from collections import Counter, defaultdict
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from datetime import datetime, time
-from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+from operator import itemgetter
+from typing import AbstractSet, Any, Callable, DefaultDict, Dict, Iterator, List, Optional, Set, Tuple
 
-from src.day1.model.abstract_account import AccountStatus, Currency, Owner
+from src.day1.model.abstract_account import MINOR_UNITS, AccountStatus, Currency, Owner
 from src.day1.model.bank_account import BankAccount
 from src.day2.model.savings_account import SavingsAccount
 from src.day2.model.premium_account import PremiumAccount
-from src.day2.model.investment_account import InvestmentAccount
+from src.day2.model.investment_account import InvestmentAccount, project_balances
 from .client import Client, ClientStatus
 
 
-# Допустимые типы счетов и соответствующие классы
-ACCOUNT_TYPES = {
-    "basic": BankAccount,
-    "bank": BankAccount,  # синоним
-    "savings": SavingsAccount,
-    "premium": PremiumAccount,
-    "investment": InvestmentAccount,
+# Допустимые типы счетов и их фабрики: (owner, initial_balance, currency, kwargs) -> счёт.
+# Одна выборка из словаря вместо цепочки проверок класса.
+_ACCOUNT_FACTORIES: Dict[str, Callable[[Owner, float, Currency, Dict[str, Any]], BankAccount]] = {
+    "basic": lambda o, b, c, kw: BankAccount(owner=o, balance=b, currency=c),
+    "bank": lambda o, b, c, kw: BankAccount(owner=o, balance=b, currency=c),  # синоним
+    "savings": lambda o, b, c, kw: SavingsAccount(owner=o, balance=b, currency=c, **kw),
+    "premium": lambda o, b, c, kw: PremiumAccount(owner=o, balance=b, currency=c, **kw),
+    "investment": lambda o, b, c, kw: InvestmentAccount(owner=o, balance=b, currency=c, portfolio=kw.get("portfolio")),
 }
 
 
-@dataclass
+def _hash_password(password: str) -> bytes:
+    """Хэш пароля: в банке пароли в открытом виде не хранятся."""
+    return hashlib.blake2b(str(password).encode("utf-8"), digest_size=16).digest()
+
+
+@dataclass(slots=True)
 class Bank:
     """
     - clients: словарь клиентов по client_id
     - accounts: словарь счетов по account_id
-    - credentials: простая база паролей
-    - failed_logins: счетчик неудачных попыток для блокировки
     - current_time_provider: функция, возвращающая текущее время (для тестов можно подменять)
+    - password_hasher: функция хэширования пароля (пароль -> bytes); можно заменить на KDF
     - suspicious_log: журнал подозрительных событий
     """
     name: str = "MyBank"
     clients: Dict[str, Client] = field(default_factory=dict)
     accounts: Dict[str, BankAccount] = field(default_factory=dict)
-    credentials: Dict[str, str] = field(default_factory=dict)
-    failed_logins: Dict[str, int] = field(default_factory=dict)
     suspicious_log: List[str] = field(default_factory=list)
     current_time_provider: Callable[[], datetime] = datetime.now
+    password_hasher: Callable[[str], bytes] = field(default=_hash_password, repr=False)
+    # Проверка времени уже выполнена (внутри bulk())
+    _ops_gate_open: bool = field(default=False, init=False, repr=False, compare=False)
+    # Коды событий, попавших в suspicious_log (проверка без поиска по тексту журнала)
+    _suspicious_codes: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
 
     # --- Вспомогательные проверки ---
     @staticmethod
     def _is_restricted_time(dt: datetime) -> bool:
         """Запрет операций с 00:00 до 05:00 включительно интервал [00:00, 05:00)."""
-        return time(0, 0) <= dt.time() < time(5, 0)
+        # [00:00, 05:00) — это ровно часы 0..4, поэтому достаточно сравнить час:
+        # без создания объектов time и их сравнения
+        return dt.hour < 5
+
+    def _log_suspicious(self, code: str, message: str) -> None:
+        self.suspicious_log.append(message)
+        self._suspicious_codes.add(code)
+
+    def has_suspicious(self, code: str) -> bool:
+        """Было ли подозрительное событие с таким кодом ("forbidden_time", "failed_logins")."""
+        return code in self._suspicious_codes
 
     def _ensure_ops_allowed(self) -> None:
+        if self._ops_gate_open:
+            return
         if self._is_restricted_time(self.current_time_provider()):
             # Фиксируем подозрительную активность
-            self.suspicious_log.append("Операция в запрещённое время")
+            self._log_suspicious("forbidden_time", "Операция в запрещённое время")
             # Запрещаем операцию
             raise PermissionError("Операции запрещены с 00:00 до 05:00.")
 
+    @contextmanager
+    def bulk(self) -> Iterator["Bank"]:
+        """Пакетный режим: проверка запрещённого времени выполняется один раз на входе,
+        а операции внутри блока её пропускают.
+
+            with bank.bulk():
+                for cid in ids:
+                    bank.open_account(cid, ...)
+        """
+        self._ensure_ops_allowed()
+        prev = self._ops_gate_open
+        self._ops_gate_open = True
+        try:
+            yield self
+        finally:
+            self._ops_gate_open = prev
+
     def _ensure_client_active(self, client_id: str) -> None:
         client = self.clients.get(client_id)
         if not client:
@@ -62,30 +104,32 @@ class Bank:
 
     # --- Клиенты ---
     def add_client(self, client: Client, password: str) -> None:
-        """Добавить клиента с установкой пароля для аутентификации."""
+        """Добавить клиента с установкой пароля для аутентификации.
+        Хэш пароля и счётчик неудачных входов хранятся в самом клиенте.
+        """
         self.clients[client.client_id] = client
-        self.credentials[client.client_id] = str(password)
-        self.failed_logins[client.client_id] = 0
+        client.password_hash = self.password_hasher(password)
+        client.failed_logins = 0
 
     def authenticate_client(self, client_id: str, password: str) -> bool:
         """Простейшая аутентификация клиента. 3 неверные попытки подряд = блокировка."""
-        if client_id not in self.clients:
+        client = self.clients.get(client_id)
+        if client is None:
             return False
-        client = self.clients[client_id]
         if client.status == ClientStatus.BLOCKED:
             return False
-        ok = self.credentials.get(client_id) == str(password)
-        if ok:
-            self.failed_logins[client_id] = 0
+        # Сравнение за постоянное время
+        if hmac.compare_digest(client.password_hash, self.password_hasher(password)):
+            client.failed_logins = 0
             return True
         # неудача
-        self.failed_logins[client_id] = self.failed_logins.get(client_id, 0) + 1
+        client.failed_logins += 1
         # помечаем подозрительно после 2-х ошибок
-        if self.failed_logins[client_id] >= 2:
+        if client.failed_logins >= 2:
             client.mark_suspicious()
-            self.suspicious_log.append(f"Подозрение: {client_id} несколько неудачных входов")
+            self._log_suspicious("failed_logins", f"Подозрение: {client_id} несколько неудачных входов")
         # блокируем после 3-х
-        if self.failed_logins[client_id] >= 3:
+        if client.failed_logins >= 3:
             client.status = ClientStatus.BLOCKED
         return False
 
@@ -106,24 +150,14 @@ class Bank:
         self._ensure_client_active(client_id)
         client = self.clients[client_id]
 
-        cls = ACCOUNT_TYPES.get(account_type.lower())
-        if not cls:
+        factory = _ACCOUNT_FACTORIES.get(account_type.lower())
+        if not factory:
             raise ValueError("Неизвестный тип счёта")
-        # Владелец для абстрактного аккаунта — используем Owner из day1
-        owner = Owner(name=client.full_name, email=client.contacts.get("email", ""))
+        # Владелец для абстрактного аккаунта — общий Owner из day1 (неизменяемый, безопасно делить)
+        owner = client.owner_view()
 
         # Создаём конкретный счёт
-        if cls is BankAccount:
-            account = BankAccount(owner=owner, balance=initial_balance, currency=currency)
-        elif cls is SavingsAccount:
-            account = SavingsAccount(owner=owner, balance=initial_balance, currency=currency, **kwargs)
-        elif cls is PremiumAccount:
-            account = PremiumAccount(owner=owner, balance=initial_balance, currency=currency, **kwargs)
-        elif cls is InvestmentAccount:
-            portfolio = kwargs.get("portfolio")
-            account = InvestmentAccount(owner=owner, balance=initial_balance, currency=currency, portfolio=portfolio)
-        else:
-            raise ValueError("Неподдерживаемый тип счёта")
+        account = factory(owner, initial_balance, currency, kwargs)
 
         self.accounts[account.id] = account
         client.add_account(account.id)
@@ -176,37 +210,99 @@ class Bank:
         owner_name_contains: Optional[str] = None,
         status: Optional[AccountStatus] = None,
     ) -> List[str]:
-        """Поиск счетов по простым критериям. Возвращает список id счетов."""
+        """Поиск счетов по простым критериям. Возвращает список id счетов в порядке открытия.
+        Один проход по словарю счетов: множество счетов клиента берётся один раз,
+        имя владельца сравнивается по готовому Owner.name_lower, статус читается у самого счёта.
+        """
+        if not (client_id or owner_name_contains or status):
+            return list(self.accounts)
+        ids: Optional[AbstractSet[str]] = None
+        if client_id:
+            c = self.clients.get(client_id)
+            if not c or not c.accounts:
+                return []
+            ids = c.accounts
+        needle = owner_name_contains.lower() if owner_name_contains else None
         result: List[str] = []
-        for acc_id, acc in self.accounts.items():
-            if client_id:
-                c = self.clients.get(client_id)
-                if not c or acc_id not in c.accounts:
-                    continue
-            if owner_name_contains:
-                if owner_name_contains.lower() not in acc.owner.name.lower():
-                    continue
-            if status and acc.status != status:
+        for aid, acc in self.accounts.items():
+            if ids is not None and aid not in ids:
+                continue
+            if needle is not None and needle not in acc.owner.name_lower:
+                continue
+            if status and acc.status is not status:
                 continue
-            result.append(acc_id)
+            result.append(aid)
         return result
 
+    def get_client_accounts(self, client_id: str) -> List[BankAccount]:
+        """Открытые счета клиента в порядке открытия (Client.accounts — неупорядоченное множество)."""
+        c = self.clients.get(client_id)
+        if not c:
+            raise KeyError("Клиент не найден")
+        ids = c.accounts
+        return [acc for aid, acc in self.accounts.items() if aid in ids]
+
+    def _sum_balances(self, client: Client) -> float:
+        """Сумма балансов счетов клиента по Client.accounts (id, которых нет в банке, пропускаются)."""
+        accounts = self.accounts
+        # Складываем целые минимальные единицы (защищённое поле, но для простоты используем напрямую)
+        return sum(acc._minor for acc in map(accounts.get, client.accounts) if acc is not None) / MINOR_UNITS
+
     def get_total_balance(self, client_id: str) -> float:
         """Подсчитать общий баланс по всем счетам клиента (без учёта валют)."""
         c = self.clients.get(client_id)
         if not c:
             raise KeyError("Клиент не найден")
-        total = 0.0
-        for acc_id in c.accounts:
-            acc = self.accounts.get(acc_id)
-            if acc:
-                total += acc._balance  # защищённое поле, но для простоты используем напрямую
-        return total
+        return self._sum_balances(c)
+
+    def apply_monthly_interest_all(self) -> int:
+        """Начислить месячные проценты по всем накопительным счетам одним проходом
+        (по правилам SavingsAccount.apply_monthly_interest).
+        Возвращает число счетов, по которым начислены проценты.
+        """
+        return sum(acc.apply_monthly_interest() for acc in self.accounts.values()
+                   if isinstance(acc, SavingsAccount))
+
+    def project_all_investments(self, rates: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Прогноз баланса через год для всех инвестиционных счетов банка одним пакетом.
+        Возвращает {account_id: прогнозный баланс}; балансы счетов не меняются.
+        Неактивные счета не растут — как в InvestmentAccount.project_yearly_growth.
+        """
+        rate_vec = InvestmentAccount.rates_vector(rates)
+        result: Dict[str, float] = {}
+        active: List[InvestmentAccount] = []
+        for acc in self.accounts.values():
+            if not isinstance(acc, InvestmentAccount):
+                continue
+            result[acc.id] = acc._balance
+            if acc.status is AccountStatus.ACTIVE:
+                active.append(acc)
+        projected = project_balances(
+            [acc._balance for acc in active],
+            [acc.shares_vector() for acc in active],
+            rate_vec,
+        )
+        for acc, value in zip(active, projected):
+            result[acc.id] = value
+        return result
+
+    def count_accounts_by_status(self) -> Dict[AccountStatus, int]:
+        """Число счетов банка по статусам (по текущему статусу каждого счёта)."""
+        return dict(Counter(acc.status for acc in self.accounts.values()))
+
+    def totals_by_currency(self) -> Dict[Currency, float]:
+        """Сумма балансов всех счетов банка по валютам (в целых минимальных единицах, без float-накопления).
+        Валюту читаем у самих счетов — как и статус в count_accounts_by_status.
+        """
+        # defaultdict(int): инкремент без вызова totals.get на каждый счёт
+        totals: DefaultDict[Currency, int] = defaultdict(int)
+        for acc in self.accounts.values():
+            totals[acc.currency] += acc._minor
+        return {cur: minor / MINOR_UNITS for cur, minor in totals.items()}
 
     def get_clients_ranking(self) -> List[Tuple[str, float]]:
         """Рейтинг клиентов по суммарному балансу (убывание). Возвращает [(client_id, total_balance), ...]."""
-        items: List[Tuple[str, float]] = []
-        for cid in self.clients.keys():
-            items.append((cid, self.get_total_balance(cid)))
-        items.sort(key=lambda x: x[1], reverse=True)
+        items: List[Tuple[str, float]] = [(cid, self._sum_balances(c)) for cid, c in self.clients.items()]
+        # itemgetter — C-ключ сортировки без вызова Python-лямбды на каждый элемент
+        items.sort(key=itemgetter(1), reverse=True)
         return items
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List
+from typing import Dict, Optional, Set
+
+from src.day1.model.abstract_account import Owner
 
 
 class ClientStatus(Enum):
@@ -11,7 +13,7 @@ class ClientStatus(Enum):
     BLOCKED = "blocked" # заблокирован (например, за неудачные попытки входа)
 
 
-@dataclass
+@dataclass(slots=True)
 class Client:
     """Модель клиента банка.
 
@@ -21,16 +23,22 @@ class Client:
       - age: возраст (должен быть >= 18)
       - contacts: контакты (телефон, email и т.п.)
       - status: статус клиента
-      - accounts: список номеров (id) его счетов
+      - accounts: множество номеров (id) его счетов
       - suspicious: пометка о подозрительной активности
+      - password_hash: хэш пароля (задаёт Bank.add_client)
+      - failed_logins: число неудачных попыток входа подряд
     """
     full_name: str
     client_id: str
     age: int
     contacts: Dict[str, str] = field(default_factory=dict)
     status: ClientStatus = ClientStatus.ACTIVE
-    accounts: List[str] = field(default_factory=list)
+    accounts: Set[str] = field(default_factory=set)
     suspicious: bool = False
+    password_hash: bytes = field(default=b"", repr=False)
+    failed_logins: int = 0
+    # Общий Owner для всех счетов клиента (см. owner_view)
+    _owner: Optional[Owner] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         # Проверка возраста
@@ -39,13 +47,22 @@ class Client:
 
     def add_account(self, account_id: str) -> None:
         """Добавить номер счёта клиенту (без дублей)."""
-        if account_id not in self.accounts:
-            self.accounts.append(account_id)
+        self.accounts.add(account_id)
 
     def remove_account(self, account_id: str) -> None:
         """Удалить номер счёта клиента, если он есть."""
-        if account_id in self.accounts:
-            self.accounts.remove(account_id)
+        self.accounts.discard(account_id)
+
+    def owner_view(self) -> Owner:
+        """Владелец для счетов клиента. Создаётся один раз и переиспользуется;
+        пересоздаётся, только если изменились ФИО или email.
+        """
+        email = self.contacts.get("email", "")
+        owner = self._owner
+        if owner is None or owner.name != self.full_name or owner.email != email:
+            owner = Owner(name=self.full_name, email=email)
+            self._owner = owner
+        return owner
 
     def mark_suspicious(self) -> None:
         """Пометить клиента как подозрительного."""
@@ -3,28 +3,49 @@
 """
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Tuple, Optional, TYPE_CHECKING
+import random
+import time
+from array import array
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple, Optional
 
-from src.day1.model.abstract_account import AccountStatus, Currency
+from src.day1.model.abstract_account import CURRENCY_INDEX, AccountStatus, Currency, Money, to_minor
 from src.day1.model.bank_account import BankAccount
 from src.day2.model.premium_account import PremiumAccount
 from src.day1.exeptions.exceptions import AccountClosedError, AccountFrozenError, InvalidOperationError, InsufficientFundsError
 
-from .transaction import Transaction, TransactionStatus, TransactionType
-from .queue import TransactionQueue
+from .transaction import Transaction, TransactionType
+from .queue import ShardedTransactionQueue, TransactionQueue
 
+# Размер стороны матрицы курсов
+_N_CUR = len(CURRENCY_INDEX)
 
-@dataclass
+# Простейшие курсы относительно RUB
+_BASE_RATES: Dict[Currency, float] = {
+    Currency.RUB: 1.0,
+    Currency.USD: 100.0,
+    Currency.EUR: 110.0,
+    Currency.KZT: 0.21,
+    Currency.CNY: 14.0,
+}
+
+
+@dataclass(frozen=True, slots=True)
 class ProcessorConfig:
-    """Настройки процессора транзакций."""
+    """Настройки процессора транзакций (неизменяемые: один объект можно отдавать нескольким процессорам)."""
     # Доп. фиксированная комиссия за внешние операции (в валюте транзакции)
     external_fee_fixed: float = 1.0
     # Количество повторных попыток при временной ошибке
     max_retries: int = 2
+    # Экспоненциальная задержка повтора: base * 2^(попытка-1), не больше max, плюс случайный jitter (сек)
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 60.0
+    retry_jitter: float = 0.25
     # Базовые курсы валют (пара -> коэффициент). Если нет пары — пытаемся через RUB как базовую валюту.
-    rates: Dict[Tuple[Currency, Currency], float] = field(default_factory=dict)
+    # В процессоре хранится неизменяемой копией (см. TransactionProcessor.config)
+    rates: Mapping[Tuple[Currency, Currency], float] = field(default_factory=dict)
 
 
 class TransactionProcessor:
@@ -40,53 +61,78 @@ class TransactionProcessor:
     - (Day5) Интеграция с аудитом и риск‑анализом: блокировать опасные операции.
     """
 
-    def __init__(self, queue: TransactionQueue, config: Optional[ProcessorConfig] = None,
+    def __init__(self, queue: TransactionQueue | ShardedTransactionQueue, config: Optional[ProcessorConfig] = None,
                  audit_log: Optional["AuditLog"] = None, risk_analyzer: Optional["RiskAnalyzer"] = None) -> None:
         self.queue = queue
         self.config = config or ProcessorConfig()
-        self.error_log: List[str] = []
+        # Журнал ошибок: (tx_id, вид ошибки, сообщение); строки — через formatted_errors
+        self.error_log: List[Tuple[str, str, str]] = []
         # Опционально: аудит и анализатор риска (Day5)
         self.audit_log = audit_log
         self.risk_analyzer = risk_analyzer
-        # Заполняем дефолтные курсы, если не переданы
-        if not self.config.rates:
-            self.config.rates = self._default_rates()
+
+    @property
+    def config(self) -> ProcessorConfig:
+        return self._config
+
+    @config.setter
+    def config(self, config: ProcessorConfig) -> None:
+        # Курсы фиксируем неизменяемой копией (дефолтные, если не переданы; переданный config не меняем):
+        # матрица курсов строится из них и всегда им соответствует
+        rates = MappingProxyType(dict(config.rates or self._default_rates()))
+        self._config = replace(config, rates=rates)
+        # Плоская матрица курсов N×N: [i*N + j] — курс валюты i к валюте j (0.0 — курса нет).
+        # Строится при смене настроек, конвертация — одно чтение из массива без хэширования пар
+        self._rate_matrix = self._build_rate_matrix(rates)
+
+    @property
+    def formatted_errors(self) -> List[str]:
+        """Журнал ошибок строками вида 'tx_id: вид: сообщение'."""
+        return [": ".join(entry) for entry in self.error_log]
+
+    @staticmethod
+    def _build_rate_matrix(rates: Mapping[Tuple[Currency, Currency], float]) -> array:
+        matrix = array("d", [0.0]) * (_N_CUR * _N_CUR)
+        for (a, b), rate in rates.items():
+            matrix[CURRENCY_INDEX[a] * _N_CUR + CURRENCY_INDEX[b]] = float(rate)
+        return matrix
 
     @staticmethod
     def _default_rates() -> Dict[Tuple[Currency, Currency], float]:
-        # Простейшие курсы относительно RUB
-        pairs: Dict[Tuple[Currency, Currency], float] = {}
-        base = {
-            Currency.RUB: 1.0,
-            Currency.USD: 100.0,
-            Currency.EUR: 110.0,
-            Currency.KZT: 0.21,
-            Currency.CNY: 14.0,
-        }
-        # коэффициент A->B = base[A] / base[B]
-        for a in base:
-            for b in base:
-                if a == b:
-                    continue
-                pairs[(a, b)] = base[a] / base[b]
-        return pairs
+        # коэффициент A->B = base[A] / base[B] («внешнее произведение» базовых курсов)
+        base = _BASE_RATES
+        return {(a, b): ra / base[b] for a, ra in base.items() for b in base if a is not b}
+
+    def _rate(self, row: int, cur_to: Currency) -> float:
+        """Курс из строки матрицы (row = индекс исходной валюты * N)."""
+        rate = self._rate_matrix[row + CURRENCY_INDEX[cur_to]]
+        if not rate:
+            raise InvalidOperationError("Нет курса для конвертации валют.")
+        return rate
 
     def convert(self, amount: float, cur_from: Currency, cur_to: Currency) -> float:
-        if cur_from == cur_to:
+        if cur_from is cur_to:
             return amount
-        rate = self.config.rates.get((cur_from, cur_to))
-        if rate is None:
-            raise InvalidOperationError("Нет курса для конвертации валют.")
-        return amount * rate
+        return amount * self._rate(CURRENCY_INDEX[cur_from] * _N_CUR, cur_to)
 
     def process_next(self, now: datetime | None = None) -> bool:
         """Обрабатывает следующую готовую транзакцию. Возвращает True, если что-то обработано."""
         tx = self.queue.pop_ready(now)
         if not tx:
             return False
+        self._handle(tx, now, time.time())
+        return True
+
+    def _handle(self, tx: Transaction, now: datetime | None, ts: float,
+                sink: Optional[List["AuditRecord"]] = None) -> None:
+        """Риск‑анализ и обработка одной извлечённой из очереди транзакции.
+        ts — метка времени для полей updated_at/processed_at транзакции.
+        sink — если задан, записи аудита копятся в нём, а не пишутся в audit_log сразу.
+        """
         # (Day5) Оценка риска перед обработкой
         if self.risk_analyzer is not None:
-            from src.day5.model.audit import RiskLevel  # локальный импорт, чтобы избежать жёсткой зависимости
+            # локальный импорт, чтобы избежать жёсткой зависимости
+            from src.day5.model.audit import AuditLevel, AuditRecord, RiskLevel
             level, reasons, extra = self.risk_analyzer.assess(
                 amount=tx.amount,
                 currency=tx.currency,
@@ -97,74 +143,102 @@ class TransactionProcessor:
             # Запись в аудит
             if self.audit_log is not None:
                 msg = f"оценка риска: {level.value}"
-                if level == RiskLevel.HIGH:
-                    self.audit_log.error(msg, tx_id=tx.tx_id, **extra)
-                elif level == RiskLevel.MEDIUM:
-                    self.audit_log.warning(msg, tx_id=tx.tx_id, **extra)
+                if level is RiskLevel.HIGH:
+                    audit_level = AuditLevel.ERROR
+                elif level is RiskLevel.MEDIUM:
+                    audit_level = AuditLevel.WARNING
                 else:
-                    self.audit_log.info(msg, tx_id=tx.tx_id, **extra)
+                    audit_level = AuditLevel.INFO
+                if sink is None:
+                    self.audit_log.add(audit_level, msg, tx_id=tx.tx_id, **extra)
+                else:
+                    sink.append(AuditRecord(level=audit_level, message=msg, extra={"tx_id": tx.tx_id, **extra}))
             # Блокировка опасных операций
-            if level == RiskLevel.HIGH:
+            if level is RiskLevel.HIGH:
                 reason = "Операция заблокирована службой рисков"
                 if reasons:
                     reason += f": {', '.join(reasons)}"
-                tx.mark_failed(reason)
-                return True
+                tx.mark_failed(reason, ts)
+                return
         try:
             self._process_transaction(tx)
-            tx.mark_processed()
-            return True
+            tx.mark_processed(ts)
         except (AccountFrozenError, AccountClosedError, InsufficientFundsError, InvalidOperationError) as e:
             # Невосстанавливаемые ошибки — помечаем как failed
-            tx.mark_failed(str(e))
-            self.error_log.append(f"{tx.tx_id}: {type(e).__name__}: {e}")
-            return True
+            tx.mark_failed(str(e), ts)
+            self.error_log.append((tx.tx_id, type(e).__name__, str(e)))
         except Exception as e:  # временная ошибка
             tx.attempts += 1
             if tx.attempts > self.config.max_retries:
-                tx.mark_failed(f"temporary_error: {e}")
-                self.error_log.append(f"{tx.tx_id}: temporary_error: {e}")
+                tx.mark_failed(f"temporary_error: {e}", ts)
+                self.error_log.append((tx.tx_id, "temporary_error", str(e)))
             else:
-                # Ре-очередь с бэкоффом
-                delay = 1 * tx.attempts
-                tx.updated_at = datetime.now(timezone.utc)
+                # Ре-очередь с экспоненциальным бэкоффом и случайным разбросом,
+                # чтобы не долбить сбойный ресурс повторами
+                cfg = self.config
+                delay = min(cfg.retry_max_delay, cfg.retry_base_delay * (1 << (tx.attempts - 1)))
+                if cfg.retry_jitter > 0:
+                    delay += random.uniform(0, cfg.retry_jitter)
+                tx.updated_at_ts = ts
                 self.queue.requeue(tx, delay_seconds=delay)
-            return True
 
     def run_all(self, now: datetime | None = None, safety_limit: int = 1000) -> None:
-        """Выполняет все готовые транзакции до опустошения очереди или достижения лимита итераций."""
+        """Выполняет все готовые транзакции до опустошения очереди или достижения лимита итераций.
+        Готовые транзакции извлекаются из очереди пачкой, а не по одной на каждый шаг;
+        записи аудита копятся локально и добавляются в audit_log одним extend в конце.
+        """
         count = 0
-        while count < safety_limit:
-            processed = self.process_next(now)
-            if not processed:
-                break
-            count += 1
+        pending: List["AuditRecord"] | None = [] if self.audit_log is not None else None
+        try:
+            while count < safety_limit:
+                batch = self.queue.pop_ready_batch(now, safety_limit - count)
+                if not batch:
+                    break
+                # Одна метка времени на всю пачку
+                ts = time.time()
+                for tx in batch:
+                    self._handle(tx, now, ts, pending)
+                count += len(batch)
+        finally:
+            if pending:
+                self.audit_log.extend(pending)
+
+    @staticmethod
+    def _leg_minor(amount: float) -> Money:
+        """Часть перевода в минимальных единицах; меньше одной единицы — ошибка."""
+        value = to_minor(amount)
+        if value <= 0:
+            raise InvalidOperationError("Сумма меньше минимальной денежной единицы.")
+        return value
 
     def _ensure_account_active(self, acc: BankAccount | None) -> None:
         if acc is None:
             return
-        if acc.status in (AccountStatus.FROZEN, AccountStatus.CLOSED):
-            if acc.status == AccountStatus.FROZEN:
-                raise AccountFrozenError("Счёт заморожен.")
-            else:
-                raise AccountClosedError("Счёт закрыт.")
+        status = acc.status
+        if status is AccountStatus.FROZEN:
+            raise AccountFrozenError("Счёт заморожен.")
+        if status is AccountStatus.CLOSED:
+            raise AccountClosedError("Счёт закрыт.")
 
     def _process_transaction(self, tx: Transaction) -> None:
         # Проверяем тип
-        if tx.tx_type != TransactionType.TRANSFER:
+        if tx.tx_type is not TransactionType.TRANSFER:
             raise InvalidOperationError("Неподдерживаемый тип транзакции.")
         # Валидация суммы
         try:
             amount = float(tx.amount)
-        except (TypeError, ValueError):
+        except (TypeError, ValueError, OverflowError):
             raise InvalidOperationError("Сумма должна быть числом.")
         if amount <= 0:
             raise InvalidOperationError("Сумма должна быть положительной.")
 
-        # Комиссия (в валюте транзакции)
-        fee_total = float(tx.fee_fixed or 0.0)
-        if tx.is_external:
-            fee_total += float(self.config.external_fee_fixed)
+        # Комиссия (в валюте транзакции); между повторными попытками не меняется
+        fee_total = tx._cached_fee
+        if fee_total is None:
+            fee_total = float(tx.fee_fixed or 0.0)
+            if tx.is_external:
+                fee_total += float(self.config.external_fee_fixed)
+            tx._cached_fee = fee_total
 
         # Аккаунты должны быть активны, если заданы
         self._ensure_account_active(tx.sender if isinstance(tx.sender, BankAccount) else tx.sender)
@@ -174,37 +248,45 @@ class TransactionProcessor:
         if tx.sender is not None and tx.recipient is not None:
             sender: BankAccount = tx.sender  # type: ignore[assignment]
             recipient: BankAccount = tx.recipient  # type: ignore[assignment]
+            cur = tx.currency
+            # Все конвертации идут из валюты транзакции — строка матрицы общая.
+            # Частый случай: все три валюты совпадают — курсы не нужны, строку не ищем
+            same_ccy = cur is sender.currency is recipient.currency
+            row = 0 if same_ccy else CURRENCY_INDEX[cur] * _N_CUR
             # Списание у отправителя: сумма + комиссия (в валюте отправителя = tx.currency)
-            if tx.currency != sender.currency:
-                # конвертируем сумму для списания из валюты транзакции в валюту счёта отправителя
-                debit_amount = self.convert(amount, tx.currency, sender.currency)
-                debit_fee = self.convert(fee_total, tx.currency, sender.currency) if fee_total > 0 else 0.0
-            else:
+            if cur is sender.currency:
                 debit_amount = amount
                 debit_fee = fee_total
-            total_debit = debit_amount + debit_fee
-            # Для премиум овердрафт допускается их собственным withdraw
-            if isinstance(sender, PremiumAccount):
-                # списание двумя шагами, чтобы применились их правила/комиссии нет в методе — поэтому уменьшаем напрямую
-                # Используем защищённый доступ через методы: сначала снимаем сумму, затем вручную уменьшаем на комиссию
-                sender.withdraw(debit_amount)
-                # Комиссию снимем как отдельное списание маленькой суммой
-                if debit_fee > 0:
-                    sender.withdraw(debit_fee)
             else:
-                # Для обычных — нельзя уходить в минус: проверим баланс
-                if total_debit > sender._balance:  # доступ к защищённому полю в рамках учебного задания
-                    raise InsufficientFundsError("Недостаточно средств для перевода.")
-                # Списываем
-                sender.withdraw(debit_amount)
-                if debit_fee > 0:
-                    sender.withdraw(debit_fee)
-
+                # конвертируем сумму для списания из валюты транзакции в валюту счёта отправителя
+                rate = self._rate(row, sender.currency)
+                debit_amount = amount * rate
+                debit_fee = fee_total * rate if fee_total > 0 else 0.0
             # Зачисление получателю: конвертация в валюту получателя
             credit_amount = amount
-            if tx.currency != recipient.currency:
-                credit_amount = self.convert(amount, tx.currency, recipient.currency)
-            recipient.deposit(credit_amount)
+            if cur is not recipient.currency:
+                credit_amount = amount * self._rate(row, recipient.currency)
+            # Все части перевода переводим в минимальные единицы до изменения балансов:
+            # сумма списания и зачисления — не меньше минимальной единицы,
+            # комиссия, округлившаяся до нуля, просто не списывается
+            debit_minor = self._leg_minor(debit_amount)
+            fee_minor = to_minor(debit_fee) if debit_fee > 0 else 0
+            credit_minor = self._leg_minor(credit_amount)
+            # Для обычных — нельзя уходить в минус: проверим баланс
+            # (премиум допускает овердрафт по правилам собственного списания)
+            if not isinstance(sender, PremiumAccount) and debit_minor + fee_minor > sender._minor:
+                raise InsufficientFundsError("Недостаточно средств для перевода.")
+            # Списание двумя шагами (сумма, затем комиссия), чтобы применились правила счёта;
+            # если какой-то шаг не прошёл — возвращаем баланс отправителя, деньги не теряются
+            before = sender._minor
+            try:
+                sender._withdraw_fast(debit_minor)
+                if fee_minor > 0:
+                    sender._withdraw_fast(fee_minor)
+                recipient._deposit_fast(credit_minor)
+            except Exception:
+                sender._minor = before
+                raise
             return
 
         # Кейс 2: Внешнее зачисление (sender=None, есть получатель)
@@ -216,7 +298,7 @@ class TransactionProcessor:
                 raise InvalidOperationError("Сумма после комиссии должна быть положительной.")
             if tx.currency != recipient.currency:
                 credit_amount = self.convert(credit_amount, tx.currency, recipient.currency)
-            recipient.deposit(credit_amount)
+            recipient._deposit_fast(self._leg_minor(credit_amount))
             return
 
         # Кейс 3: Внешнее списание (recipient=None, есть отправитель)
@@ -226,7 +308,7 @@ class TransactionProcessor:
             if tx.currency != sender.currency:
                 debit_amount = self.convert(debit_amount, tx.currency, sender.currency)
             # Списать средствами счёта (премиум может уйти в минус)
-            sender.withdraw(debit_amount)
+            sender._withdraw_fast(self._leg_minor(debit_amount))
             return
 
         # Иначе некорректная конфигурация
@@ -4,19 +4,36 @@
 from __future__ import annotations
 
 import heapq
+import zlib
 from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from typing import List, Tuple, Dict
 
 from .transaction import Transaction, TransactionStatus
 
+# Статусы — синглтоны Enum, поэтому в горячих проверках сравниваем по `is`
+_PENDING = TransactionStatus.PENDING
 
-@dataclass(order=True)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+
+
+def _to_us(dt: datetime) -> int:
+    """Время в целых микросекундах от эпохи: ключ кучи сравнивается как int.
+    Время без часового пояса отклоняется: молча считать его UTC (или местным) значило бы
+    сдвинуть срок выполнения на смещение пояса относительно времени с tz.
+    """
+    if dt.tzinfo is None or dt.utcoffset() is None:
+        raise ValueError("Время должно быть с часовым поясом (например, datetime.now(timezone.utc)).")
+    return (dt - _EPOCH) // _US
+
+
+@dataclass(order=True, slots=True)
 class _QueueItem:
-    """Внутренний элемент в куче: сортировка по scheduled_at, затем по -priority (приоритет выше — раньше).
-    Также используется порядковый номер для стабильности.
+    """Внутренний элемент в куче: сортировка по времени выполнения (мкс от эпохи), затем по -priority
+    (приоритет выше — раньше). Также используется порядковый номер для стабильности.
     """
-    scheduled_at: datetime
+    scheduled_us: int
     neg_priority: int
     order: int
     tx_id: str = field(compare=False)
@@ -27,23 +44,34 @@ class TransactionQueue:
     - add(tx): добавить транзакцию
     - cancel(tx_id): отменить
     - pop_ready(now): извлечь следующую готовую к выполнению
+    - pop_ready_batch(now, max_n): извлечь сразу все готовые (в порядке очереди)
     - __len__(): количество активных (не отменённых/не выполненных) в очереди
     - list_pending(): список id ожидающих
+    - on_tx_finalized(tx_id): сообщить, что транзакция завершена вне очереди
     """
 
     def __init__(self) -> None:
         self._heap: List[_QueueItem] = []
         self._items: Dict[str, Transaction] = {}
         self._order_seq: int = 0
+        # Ожидающие в очереди: id -> order её актуального элемента кучи (dict — сохраняет
+        # порядок добавления); извлечённая транзакция отсюда убирается и возвращается
+        # только через requeue. Элемент кучи жив, только если его order совпадает с этим.
+        self._pending: Dict[str, int] = {}
+        # Число «мёртвых» элементов кучи (отменённые или заменённые повторной постановкой)
+        self._dead: int = 0
 
     def add(self, tx: Transaction) -> None:
         if tx.tx_id in self._items:
             # перезапись запрещаем для простоты
             raise ValueError("Транзакция с таким id уже есть в очереди.")
+        # Ключ считаем до изменения очереди: время без tz отклоняется, не оставляя следов
+        scheduled_us = _to_us(tx.scheduled_at)
         self._items[tx.tx_id] = tx
         self._order_seq += 1
+        self._pending[tx.tx_id] = self._order_seq
         item = _QueueItem(
-            scheduled_at=tx.scheduled_at,
+            scheduled_us=scheduled_us,
             neg_priority=-int(tx.priority),
             order=self._order_seq,
             tx_id=tx.tx_id,
@@ -54,49 +82,202 @@ class TransactionQueue:
         tx = self._items.get(tx_id)
         if not tx:
             return False
-        if tx.status in {TransactionStatus.PROCESSED, TransactionStatus.CANCELLED}:
+        if tx.status is TransactionStatus.PROCESSED or tx.status is TransactionStatus.CANCELLED:
             return False
         tx.cancel(reason)
+        self._drop_pending(tx_id)
         return True
 
-    def pop_ready(self, now: datetime | None = None) -> Transaction | None:
-        """Достаёт следующую транзакцию, у которой наступило время выполнения."""
-        now = now or datetime.now(timezone.utc)
-        while self._heap:
-            top = self._heap[0]
-            if top.scheduled_at > now:
+    def _peek_ready(self, now_us: int) -> _QueueItem | None:
+        """Живой элемент на вершине кучи, если его время наступило (не извлекая его).
+        Мёртвые элементы и завершённые вне очереди транзакции по пути выбрасываются.
+        """
+        heap = self._heap
+        pending = self._pending
+        while heap:
+            top = heap[0]
+            if top.scheduled_us > now_us:
                 return None
-            heapq.heappop(self._heap)
-            tx = self._items.get(top.tx_id)
-            if tx is None:
+            # Пропускаем мёртвые элементы: отменённые и заменённые повторной постановкой
+            if pending.get(top.tx_id) != top.order:
+                heapq.heappop(heap)
+                self._dead -= 1
                 continue
-            # Пропускаем отменённые/уже обработанные
-            if tx.status != TransactionStatus.PENDING:
+            tx = self._items.get(top.tx_id)
+            if tx is None or tx.status is not _PENDING:
+                heapq.heappop(heap)
+                del pending[top.tx_id]
                 continue
-            return tx
+            return top
         return None
 
-    def requeue(self, tx: Transaction, delay_seconds: int = 0) -> None:
+    def pop_ready(self, now: datetime | None = None) -> Transaction | None:
+        """Достаёт следующую транзакцию, у которой наступило время выполнения."""
+        top = self._peek_ready(_to_us(now or datetime.now(timezone.utc)))
+        if top is None:
+            return None
+        heapq.heappop(self._heap)
+        del self._pending[top.tx_id]
+        return self._items[top.tx_id]
+
+    def pop_ready_batch(self, now: datetime | None = None, max_n: int | None = None) -> List[Transaction]:
+        """Достаёт все готовые транзакции (не больше max_n) в том же порядке,
+        в каком их по одной вернул бы pop_ready.
+        """
+        now_us = _to_us(now or datetime.now(timezone.utc))
+        heap = self._heap
+        items = self._items
+        batch: List[Transaction] = []
+        while heap and (max_n is None or len(batch) < max_n):
+            top = heap[0]
+            if top.scheduled_us > now_us:
+                break
+            heapq.heappop(heap)
+            # Пропускаем мёртвые элементы: отменённые и заменённые повторной постановкой
+            if self._pending.get(top.tx_id) != top.order:
+                self._dead -= 1
+                continue
+            del self._pending[top.tx_id]
+            tx = items.get(top.tx_id)
+            if tx is None or tx.status is not _PENDING:
+                continue
+            batch.append(tx)
+        return batch
+
+    def requeue(self, tx: Transaction, delay_seconds: float = 0) -> None:
         """Вернуть транзакцию обратно в очередь (например, для повторной попытки).
         Элемент уже есть в self._items, поэтому просто добавляем новую запись в кучу.
         """
-        if tx.status != TransactionStatus.PENDING:
+        if tx.status is not _PENDING:
             return
         # переназначаем время
         tx.scheduled_at = (tx.scheduled_at or datetime.now(timezone.utc))
         if delay_seconds > 0:
             tx.scheduled_at = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
-        # положим новый элемент в кучу без изменения self._items
+        scheduled_us = _to_us(tx.scheduled_at)
+        # положим новый элемент в кучу без изменения self._items;
+        # если транзакция ещё в куче, её прежний элемент становится мёртвым
+        if tx.tx_id in self._pending:
+            self._dead += 1
         self._order_seq += 1
+        self._pending[tx.tx_id] = self._order_seq
         heapq.heappush(self._heap, _QueueItem(
-            scheduled_at=tx.scheduled_at,
+            scheduled_us=scheduled_us,
             neg_priority=-int(tx.priority),
             order=self._order_seq,
             tx_id=tx.tx_id,
         ))
 
+    def on_tx_finalized(self, tx_id: str) -> None:
+        """Транзакция завершена (обработана/отменена) в обход очереди — убрать из ожидающих."""
+        self._drop_pending(tx_id)
+
+    def _drop_pending(self, tx_id: str) -> None:
+        """Убрать id из ожидающих; его элемент в куче становится мёртвым.
+        Когда мёртвых больше половины кучи — пересобираем её только из живых.
+        """
+        if tx_id not in self._pending:
+            return
+        del self._pending[tx_id]
+        self._dead += 1
+        if self._dead > len(self._heap) // 2:
+            pending = self._pending
+            self._heap = [it for it in self._heap if pending.get(it.tx_id) == it.order]
+            heapq.heapify(self._heap)
+            # Пересчитываем, а не обнуляем: у каждой ожидающей ровно один живой элемент
+            self._dead = len(self._heap) - len(pending)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def list_pending(self) -> List[str]:
+        return list(self._pending)
+
+
+class ShardedTransactionQueue:
+    """Очередь, разбитая на несколько TransactionQueue по отправителю.
+
+    Все транзакции одного отправителя (для внешнего зачисления — получателя) попадают
+    в один шард, поэтому каждая куча меньше, а порядок операций по счёту сохраняется.
+    Порядок выдачи тот же, что у одной TransactionQueue: вершины шардов сливаются через
+    небольшую кучу по (время, -приоритет, общий порядковый номер постановки).
+    Интерфейс совпадает с TransactionQueue, процессору всё равно, какую очередь обрабатывать.
+    """
+
+    def __init__(self, n_shards: int = 4) -> None:
+        if n_shards < 1:
+            raise ValueError("Количество шардов должно быть положительным.")
+        self.shards: List[TransactionQueue] = [TransactionQueue() for _ in range(n_shards)]
+        # tx_id -> шард, в котором лежит транзакция
+        self._shard_of: Dict[str, TransactionQueue] = {}
+        # tx_id -> номер последней постановки по всем шардам (у шардов номера свои,
+        # а при равных времени и приоритете раньше выдаётся поставленная раньше)
+        self._seq_of: Dict[str, int] = {}
+        self._seq: int = 0
+
+    def shard_for(self, tx: Transaction) -> TransactionQueue:
+        account = tx.sender if tx.sender is not None else tx.recipient
+        key = str(getattr(account, "id", ""))
+        # crc32 вместо hash(): распределение не зависит от PYTHONHASHSEED
+        return self.shards[zlib.crc32(key.encode("utf-8")) % len(self.shards)]
+
+    def add(self, tx: Transaction) -> None:
+        if tx.tx_id in self._shard_of:
+            raise ValueError("Транзакция с таким id уже есть в очереди.")
+        shard = self.shard_for(tx)
+        shard.add(tx)
+        self._shard_of[tx.tx_id] = shard
+        self._seq += 1
+        self._seq_of[tx.tx_id] = self._seq
+
+    def cancel(self, tx_id: str, reason: str = "cancelled_by_user") -> bool:
+        shard = self._shard_of.get(tx_id)
+        return shard.cancel(tx_id, reason) if shard is not None else False
+
+    def _head(self, i: int, now_us: int) -> Tuple[int, int, int, int] | None:
+        """Ключ слияния для готовой вершины шарда i (или None, если готовых нет)."""
+        top = self.shards[i]._peek_ready(now_us)
+        if top is None:
+            return None
+        return top.scheduled_us, top.neg_priority, self._seq_of[top.tx_id], i
+
+    def pop_ready(self, now: datetime | None = None) -> Transaction | None:
+        batch = self.pop_ready_batch(now, 1)
+        return batch[0] if batch else None
+
+    def pop_ready_batch(self, now: datetime | None = None, max_n: int | None = None) -> List[Transaction]:
+        """Все готовые транзакции (не больше max_n) в порядке одной общей очереди."""
+        now = now or datetime.now(timezone.utc)
+        now_us = _to_us(now)
+        heads = [h for h in (self._head(i, now_us) for i in range(len(self.shards))) if h is not None]
+        heapq.heapify(heads)
+        batch: List[Transaction] = []
+        while heads and (max_n is None or len(batch) < max_n):
+            i = heads[0][3]
+            tx = self.shards[i].pop_ready(now)
+            if tx is not None:
+                batch.append(tx)
+            head = self._head(i, now_us)
+            if head is None:
+                heapq.heappop(heads)
+            else:
+                heapq.heapreplace(heads, head)
+        return batch
+
+    def requeue(self, tx: Transaction, delay_seconds: float = 0) -> None:
+        shard = self._shard_of.get(tx.tx_id)
+        if shard is not None and tx.status is _PENDING:
+            shard.requeue(tx, delay_seconds)
+            self._seq += 1
+            self._seq_of[tx.tx_id] = self._seq
+
+    def on_tx_finalized(self, tx_id: str) -> None:
+        shard = self._shard_of.get(tx_id)
+        if shard is not None:
+            shard.on_tx_finalized(tx_id)
+
     def __len__(self) -> int:
-        return sum(1 for tx in self._items.values() if tx.status == TransactionStatus.PENDING)
+        return sum(len(shard) for shard in self.shards)
 
     def list_pending(self) -> List[str]:
-        return [tx_id for tx_id, tx in self._items.items() if tx.status == TransactionStatus.PENDING]
+        return [tx_id for shard in self.shards for tx_id in shard.list_pending()]
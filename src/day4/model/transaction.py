@@ -3,6 +3,7 @@
 """
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
@@ -24,7 +25,7 @@ class TransactionStatus(Enum):
     FAILED = "failed"         # неуспешна (ошибка)
 
 
-@dataclass
+@dataclass(slots=True)
 class Transaction:
     """
     Транзакция перевода средств.
@@ -38,7 +39,9 @@ class Transaction:
       - sender: счёт-отправитель (может быть None для внешнего зачисления)
       - recipient: счёт-получатель (может быть None для внешнего списания)
       - status, failure_reason: статус и причина ошибки
-      - created_at, scheduled_at, processed_at, updated_at: метки времени (UTC)
+      - created_at, scheduled_at: метки времени (UTC)
+      - processed_at_ts, updated_at_ts: метки времени в POSIX-секундах
+        (datetime по запросу — свойства processed_at/updated_at)
       - priority: приоритет (больше — важнее)
       - attempts: количество попыток
       - is_external: флаг «внешняя» операция (для доп. комиссии)
@@ -58,22 +61,39 @@ class Transaction:
     status: TransactionStatus = TransactionStatus.PENDING
     failure_reason: str | None = None
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
-    processed_at: datetime | None = None
-    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    processed_at_ts: float | None = None
+    updated_at_ts: float = field(default_factory=time.time)
     attempts: int = 0
+    # Итоговая комиссия, посчитанная процессором при первой попытке (для повторов)
+    _cached_fee: float | None = field(default=None, init=False, repr=False, compare=False)
 
-    def mark_failed(self, reason: str) -> None:
+    @property
+    def updated_at(self) -> datetime:
+        return datetime.fromtimestamp(self.updated_at_ts, timezone.utc)
+
+    @updated_at.setter
+    def updated_at(self, value: datetime) -> None:
+        self.updated_at_ts = value.timestamp()
+
+    @property
+    def processed_at(self) -> datetime | None:
+        if self.processed_at_ts is None:
+            return None
+        return datetime.fromtimestamp(self.processed_at_ts, timezone.utc)
+
+    # ts — готовая метка времени (например, одна на пачку в процессоре); по умолчанию — текущее время
+    def mark_failed(self, reason: str, ts: float | None = None) -> None:
         self.status = TransactionStatus.FAILED
         self.failure_reason = reason
-        self.updated_at = datetime.now(timezone.utc)
+        self.updated_at_ts = time.time() if ts is None else ts
 
-    def mark_processed(self) -> None:
+    def mark_processed(self, ts: float | None = None) -> None:
         self.status = TransactionStatus.PROCESSED
         self.failure_reason = None
-        self.processed_at = datetime.now(timezone.utc)
-        self.updated_at = self.processed_at
+        self.processed_at_ts = time.time() if ts is None else ts
+        self.updated_at_ts = self.processed_at_ts
 
-    def cancel(self, reason: str = "cancelled_by_user") -> None:
+    def cancel(self, reason: str = "cancelled_by_user", ts: float | None = None) -> None:
         self.status = TransactionStatus.CANCELLED
         self.failure_reason = reason
-        self.updated_at = datetime.now(timezone.utc)
+        self.updated_at_ts = time.time() if ts is None else ts
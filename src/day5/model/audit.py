@@ -2,17 +2,23 @@
 Day5 — Аудит и риск‑анализ.
 
 Простая система:
-- AuditLog: уровни важности, хранение в памяти, запись в файл, фильтрация, отчёты
+- AuditLog: уровни важности, хранение в памяти, запись в файл (в т.ч. дозапись JSONL), фильтрация, отчёты
 - RiskAnalyzer: определение подозрительных операций и уровня риска (низкий/средний/высокий)
 """
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import json
+import os
+from array import array
+from bisect import insort
+from collections import Counter, deque
+from dataclasses import dataclass, field, replace
 from enum import Enum
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Callable
-from datetime import datetime, timezone, time, timedelta
+from types import MappingProxyType
+from typing import IO, Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+from datetime import datetime, timezone, time
 
-from src.day1.model.abstract_account import Currency
+from src.day1.model.abstract_account import CURRENCY_INDEX, Currency
 
 
 class AuditLevel(Enum):
@@ -22,7 +28,7 @@ class AuditLevel(Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class AuditRecord:
     """Одна запись аудита."""
     level: AuditLevel
@@ -32,13 +38,85 @@ class AuditRecord:
 
 
 class AuditLog:
-    """Простой аудит-лог. Пишет в память и по запросу в файл, умеет фильтровать."""
+    """Простой аудит-лог. Пишет в память и по запросу в файл, умеет фильтровать.
 
-    def __init__(self) -> None:
-        self.records: List[AuditRecord] = []
+    Если задан path, каждая запись сразу дописывается в файл строкой JSON (JSONL)
+    через буфер; сброс на диск (flush + fsync) — каждые flush_every записей и в flush()/close().
+    Можно использовать как контекстный менеджер: файл закрывается и при исключении.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_every: int = 100) -> None:
+        # Записи меняются только через add/extend — так индексы ниже не расходятся с журналом
+        self._records: List[AuditRecord] = []
+        # Подмножество записей уровня WARNING/ERROR (в порядке добавления) — единственный
+        # индекс: из него берутся подозрительные операции, фильтр по этим уровням и
+        # статистика ошибок, без пересканирования всего лога
+        self._suspicious: List[AuditRecord] = []
+        self.flush_every = flush_every
+        self._file: Optional[IO[str]] = None
+        self._unflushed = 0
+        if path is not None:
+            self._file = open(path, "a", buffering=1 << 20, encoding="utf-8")
 
     def add(self, level: AuditLevel, message: str, **extra: Any) -> None:
-        self.records.append(AuditRecord(level=level, message=message, extra=extra))
+        record = AuditRecord(level=level, message=message, extra=extra)
+        self._records.append(record)
+        if level is not AuditLevel.INFO:
+            self._suspicious.append(record)
+        if self._file is not None:
+            self._append_line(record)
+
+    def extend(self, records: Iterable[AuditRecord]) -> None:
+        """Добавить пачку готовых записей — то же, что add для каждой, но за один проход
+        (в файл — одной записью)."""
+        records = list(records)
+        self._records.extend(records)
+        info = AuditLevel.INFO
+        self._suspicious.extend(r for r in records if r.level is not info)
+        if self._file is not None and records:
+            self._file.write("".join([self._format_line(r) for r in records]))
+            self._unflushed += len(records)
+            if self._unflushed >= self.flush_every:
+                self.flush()
+
+    @staticmethod
+    def _format_line(r: AuditRecord) -> str:
+        line = {"ts": r.timestamp.isoformat(), "lvl": r.level.value, "msg": r.message, **r.extra}
+        return json.dumps(line, ensure_ascii=False, default=str) + "\n"
+
+    def _append_line(self, r: AuditRecord) -> None:
+        self._file.write(self._format_line(r))
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Сбросить буфер JSONL-файла на диск (fsync — записи переживают сбой системы)."""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unflushed = 0
+
+    def close(self) -> None:
+        """Сбросить буфер и закрыть JSONL-файл (записи в памяти остаются)."""
+        if self._file is not None:
+            try:
+                self.flush()
+            finally:
+                self._file.close()
+                self._file = None
+                self._unflushed = 0
+
+    @property
+    def records(self) -> Tuple[AuditRecord, ...]:
+        """Все записи в порядке добавления (копия только для чтения; добавлять — через add/extend)."""
+        return tuple(self._records)
+
+    def __enter__(self) -> "AuditLog":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     def info(self, message: str, **extra: Any) -> None:
         self.add(AuditLevel.INFO, message, **extra)
@@ -52,45 +130,47 @@ class AuditLog:
     def filter(self, *, level: Optional[AuditLevel] = None,
                predicate: Optional[Callable[[AuditRecord], bool]] = None) -> List[AuditRecord]:
         """Фильтрация по уровню и/или произвольному предикату."""
-        items = self.records
-        if level is not None:
-            items = [r for r in items if r.level == level]
+        if level is None:
+            items: List[AuditRecord] = self._records
+        else:
+            # WARNING/ERROR ищем только среди подозрительных записей
+            source = self._records if level is AuditLevel.INFO else self._suspicious
+            items = [r for r in source if r.level is level]
         if predicate is not None:
-            items = [r for r in items if predicate(r)]
+            return [r for r in items if predicate(r)]
         return list(items)
 
     def save_to_file(self, path: str) -> None:
         """Сохранить лог в текстовый файл (простой формат)."""
+        # Собираем весь текст и пишем одним вызовом
+        lines = []
+        for r in self._records:
+            extra = " ".join(f"{k}={v}" for k, v in r.extra.items())
+            lines.append(f"[{r.timestamp.isoformat()}] {r.level.value}: {r.message} {extra}\n")
         with open(path, "w", encoding="utf-8") as f:
-            for r in self.records:
-                ts = r.timestamp.isoformat()
-                lvl = r.level.value
-                extra = " ".join(f"{k}={v}" for k, v in r.extra.items())
-                f.write(f"[{ts}] {lvl}: {r.message} {extra}\n")
+            f.write("".join(lines))
 
     # --- Отчёты ---
     def get_suspicious_operations(self) -> List[AuditRecord]:
         """Вернуть только подозрительные записи (WARNING/ERROR)."""
-        return [r for r in self.records if r.level in (AuditLevel.WARNING, AuditLevel.ERROR)]
+        return list(self._suspicious)
 
     def get_error_statistics(self) -> Dict[str, int]:
         """Простая статистика ошибок по тексту сообщения (подсчёт по префиксу до двоеточия)."""
-        stats: Dict[str, int] = {}
-        for r in self.filter(level=AuditLevel.ERROR):
-            key = r.message.split(":", 1)[0]
-            stats[key] = stats.get(key, 0) + 1
-        return stats
+        # Считаем по подмножеству WARNING/ERROR, а не по всему логу
+        error = AuditLevel.ERROR
+        return dict(Counter(r.message.split(":", 1)[0] for r in self._suspicious if r.level is error))
 
     def get_clients_risk_profile(self) -> Dict[str, Dict[str, int]]:
         """Риск‑профиль клиента: считаем WARNING/ERROR по владельцу (owner_name в extra)."""
         profile: Dict[str, Dict[str, int]] = {}
-        for r in self.get_suspicious_operations():
+        for r in self._suspicious:
+            key = "warning" if r.level is AuditLevel.WARNING else "error"
             owner = str(r.extra.get("owner_name", "?"))
-            d = profile.setdefault(owner, {"warning": 0, "error": 0})
-            if r.level == AuditLevel.WARNING:
-                d["warning"] += 1
-            if r.level == AuditLevel.ERROR:
-                d["error"] += 1
+            d = profile.get(owner)
+            if d is None:
+                d = profile[owner] = {"warning": 0, "error": 0}
+            d[key] += 1
         return profile
 
 
@@ -101,11 +181,11 @@ class RiskLevel(Enum):
     HIGH = "high"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RiskConfig:
-    """Настройки RiskAnalyzer."""
-    # Порог крупной суммы по валюте
-    large_amount_threshold: Dict[Currency, float] = field(default_factory=lambda: {
+    """Настройки RiskAnalyzer (неизменяемые)."""
+    # Порог крупной суммы по валюте (в RiskAnalyzer — неизменяемой копией)
+    large_amount_threshold: Mapping[Currency, float] = field(default_factory=lambda: {
         Currency.RUB: 100_000.0,
         Currency.USD: 2_000.0,
         Currency.EUR: 2_000.0,
@@ -136,10 +216,26 @@ class RiskAnalyzer:
     def __init__(self, config: Optional[RiskConfig] = None) -> None:
         self.config = config or RiskConfig()
         # История для частоты: по отправителю храним времена последних операций
-        self._history: Dict[str, List[datetime]] = {}
+        # (POSIX-секунды, по возрастанию — старые удаляются с начала очереди)
+        self._history: Dict[str, deque[float]] = {}
         # Таблица новых получателей: для отправителя множество уже виденных получателей
         self._known_recipients: Dict[str, set[str]] = {}
 
+    @property
+    def config(self) -> RiskConfig:
+        return self._config
+
+    @config.setter
+    def config(self, config: RiskConfig) -> None:
+        # Пороги фиксируем неизменяемой копией: производные таблицы ниже всегда им соответствуют
+        thresholds = MappingProxyType(dict(config.large_amount_threshold))
+        self._config = replace(config, large_amount_threshold=thresholds)
+        # Границы ночного периода в секундах от начала суток
+        self._night_from_s = self._seconds_of_day(config.night_from)
+        self._night_to_s = self._seconds_of_day(config.night_to)
+        # Пороги крупной суммы по индексу валюты (нет порога — бесконечность)
+        self._thresholds = array("d", [float(thresholds.get(c, float("inf"))) for c in CURRENCY_INDEX])
+
     @staticmethod
     def _account_id(obj: Any) -> str:
         """Аккуратно достаём идентификатор счёта, если это банковский счёт."""
@@ -156,9 +252,18 @@ class RiskAnalyzer:
         except Exception:
             return ""
 
+    @staticmethod
+    def _seconds_of_day(t: time | datetime) -> int:
+        return t.hour * 3600 + t.minute * 60 + t.second
+
     def _is_night(self, dt: datetime) -> bool:
-        t = dt.timetz()
-        return self.config.night_from <= t.replace(tzinfo=None) < self.config.night_to
+        # Целочисленное сравнение без создания объектов time
+        s = self._seconds_of_day(dt)
+        lo, hi = self._night_from_s, self._night_to_s
+        if lo <= hi:
+            return lo <= s < hi
+        # Период через полночь (например, 22:00–05:00)
+        return s >= lo or s < hi
 
     def assess(self, *, amount: float, currency: Currency, sender: Any, recipient: Any,
                now: Optional[datetime] = None) -> Tuple[RiskLevel, List[str], Dict[str, Any]]:
@@ -172,44 +277,50 @@ class RiskAnalyzer:
             amt = float(amount)
         except Exception:
             amt = 0.0
-        threshold = self.config.large_amount_threshold.get(currency, float("inf"))
-        if amt >= threshold:
+        if amt >= self._thresholds[CURRENCY_INDEX[currency]]:
             level = RiskLevel.HIGH
             reasons.append("крупная сумма")
 
         # 2) Частые операции (по отправителю)
         sender_id = self._account_id(sender)
         if sender_id:
-            hist = self._history.setdefault(sender_id, [])
+            hist = self._history.get(sender_id)
+            if hist is None:
+                hist = self._history[sender_id] = deque()
             # Удаляем старые записи
-            window = timedelta(seconds=self.config.frequency_window_seconds)
-            cutoff = now - window
-            hist[:] = [ts for ts in hist if ts >= cutoff]
-            hist.append(now)
+            now_ts = now.timestamp()
+            cutoff = now_ts - self.config.frequency_window_seconds
+            while hist and hist[0] < cutoff:
+                hist.popleft()
+            if not hist or hist[-1] <= now_ts:
+                hist.append(now_ts)
+            else:
+                # Время операции раньше уже учтённых — вставляем с сохранением порядка
+                insort(hist, now_ts)
             if len(hist) >= self.config.frequency_limit:
                 level = RiskLevel.HIGH
                 reasons.append("частые операции")
 
         # 3) Новый получатель для отправителя
+        rec_id = self._account_id(recipient)
         if sender_id:
-            rec_id = self._account_id(recipient)
             known = self._known_recipients.setdefault(sender_id, set())
             if rec_id and rec_id not in known:
                 # Первый перевод на этот счёт — помечаем MEDIUM, но не повышаем, если уже HIGH
                 reasons.append("перевод на новый счёт")
-                if level == RiskLevel.LOW:
+                if level is RiskLevel.LOW:
                     level = RiskLevel.MEDIUM
                 known.add(rec_id)
 
         # 4) Ночная операция
         if self._is_night(now):
             reasons.append("операция ночью")
-            if level == RiskLevel.LOW:
+            if level is RiskLevel.LOW:
                 level = RiskLevel.MEDIUM
 
         extra = {
             "sender_id": sender_id,
-            "recipient_id": self._account_id(recipient),
+            "recipient_id": rec_id,
             "owner_name": self._owner_name(sender) or self._owner_name(recipient) or "",
             "amount": amt,
             "currency": currency.value,
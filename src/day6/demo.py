@@ -11,6 +11,8 @@ Day 6 — Демонстрационная программа.
 from __future__ import annotations
 
 import random
+import sys
+from collections import Counter
 from datetime import datetime, timezone
 from typing import List, Dict, Tuple
 
@@ -114,16 +116,20 @@ def make_transactions(accounts: Dict[str, BankAccount]) -> List[Transaction]:
     """Сгенерировать список из ~40 транзакций, часть ошибочных и подозрительных."""
     txs: List[Transaction] = []
     acc_list = list(accounts.values())
+    n = len(acc_list)
+    idx = range(n)
     now = datetime.now(timezone.utc)
 
-    # 30 внутренних переводов (случайные пары)
-    for i in range(1, 31):
-        a = random.choice(acc_list)
-        b = random.choice(acc_list)
-        # избегаем перевода самому себе
-        if a is b:
-            b = random.choice(acc_list)
-        amount = random.choice([10, 20, 50, 100, 200])
+    # 30 внутренних переводов (случайные пары). Все случайные величины тянем
+    # пачкой через random.choices — один вызов на серию вместо нескольких на транзакцию
+    senders = random.choices(idx, k=30)
+    # избегаем перевода самому себе: совпавший индекс сдвигаем на соседний счёт
+    recipients = [r if r != s else (r + 1) % n for s, r in zip(senders, random.choices(idx, k=30))]
+    amounts = random.choices([10, 20, 50, 100, 200], k=30)
+    priorities = random.choices(range(11), k=30)
+    for i, (ia, ib, amount, prio) in enumerate(zip(senders, recipients, amounts, priorities), start=1):
+        a = acc_list[ia]
+        b = acc_list[ib]
         # несколько больших сумм, чтобы пометить подозрительными
         if i % 15 == 0:
             amount = 2000.0
@@ -135,13 +141,13 @@ def make_transactions(accounts: Dict[str, BankAccount]) -> List[Transaction]:
             sender=a,
             recipient=b,
             scheduled_at=now,
-            priority=random.randint(0, 10),
+            priority=prio,
         ))
 
     # 10 внешних операций: 5 зачислений и 5 списаний
-    for j in range(31, 36):
-        b = random.choice(acc_list)
-        amt = random.choice([50, 100, 300])
+    ext_in = zip(range(31, 36), random.choices(acc_list, k=5), random.choices([50, 100, 300], k=5),
+                 random.choices(range(6), k=5))
+    for j, b, amt, prio in ext_in:
         txs.append(Transaction(
             tx_id=f"t{j}",
             tx_type=TransactionType.TRANSFER,
@@ -151,11 +157,11 @@ def make_transactions(accounts: Dict[str, BankAccount]) -> List[Transaction]:
             recipient=b,
             is_external=True,
             scheduled_at=now,
-            priority=random.randint(0, 5),
+            priority=prio,
         ))
-    for j in range(36, 41):
-        a = random.choice(acc_list)
-        amt = random.choice([20, 40, 80])
+    ext_out = zip(range(36, 41), random.choices(acc_list, k=5), random.choices([20, 40, 80], k=5),
+                  random.choices(range(6), k=5))
+    for j, a, amt, prio in ext_out:
         txs.append(Transaction(
             tx_id=f"t{j}",
             tx_type=TransactionType.TRANSFER,
@@ -165,7 +171,7 @@ def make_transactions(accounts: Dict[str, BankAccount]) -> List[Transaction]:
             recipient=None,
             is_external=True,
             scheduled_at=now,
-            priority=random.randint(0, 5),
+            priority=prio,
         ))
 
     # Создадим явную ошибку: слишком большая сумма у обычного счёта (недостаточно средств)
@@ -203,12 +209,15 @@ def make_transactions(accounts: Dict[str, BankAccount]) -> List[Transaction]:
 
 def simulate() -> None:
     """Полная симуляция: создание данных, запуск очереди и процессора, вывод результатов."""
-    print("=== Day 6: Демонстрация банковской системы ===")
+    # Весь вывод копим в списке и пишем одним вызовом в конце
+    out: List[str] = []
+    emit = out.append
+    emit("=== Day 6: Демонстрация банковской системы ===")
     random.seed(42)  # детерминированность
 
     bank, clients = build_bank()
     accounts = open_accounts(bank, clients)
-    print(f"Создан банк {bank.name}. Клиентов: {len(clients)}. Счетов: {len(accounts)}")
+    emit(f"Создан банк {bank.name}. Клиентов: {len(clients)}. Счетов: {len(accounts)}")
 
     # Аудит и риски
     audit = AuditLog()
@@ -223,7 +232,7 @@ def simulate() -> None:
 
     # Логирование попадания в очередь
     for tx in txs:
-        print(f"[QUEUE] Добавлена транзакция {tx.tx_id} (prio={tx.priority}, amount={tx.amount} {tx.currency.value})")
+        emit(f"[QUEUE] Добавлена транзакция {tx.tx_id} (prio={tx.priority}, amount={tx.amount} {tx.currency.value})")
         queue.add(tx)
 
     # Обработка: часть транзакций — в ночное время, чтобы сработали ночные риски
@@ -231,62 +240,64 @@ def simulate() -> None:
     proc.run_all(now=now_night)
 
     # Итоги по транзакциям
-    processed = sum(1 for t in txs if t.status == TransactionStatus.PROCESSED)
-    failed = sum(1 for t in txs if t.status == TransactionStatus.FAILED)
-    cancelled = sum(1 for t in txs if t.status == TransactionStatus.CANCELLED)
-    pending = sum(1 for t in txs if t.status == TransactionStatus.PENDING)
-    print("=== Итоги обработки ===")
-    print(f"Успешно: {processed}, Ошибки: {failed}, Отменены: {cancelled}, В ожидании: {pending}")
+    # Один проход по транзакциям вместо четырёх
+    by_status = Counter(t.status for t in txs)
+    processed = by_status[TransactionStatus.PROCESSED]
+    failed = by_status[TransactionStatus.FAILED]
+    cancelled = by_status[TransactionStatus.CANCELLED]
+    pending = by_status[TransactionStatus.PENDING]
+    emit("=== Итоги обработки ===")
+    emit(f"Успешно: {processed}, Ошибки: {failed}, Отменены: {cancelled}, В ожидании: {pending}")
 
     # Показать несколько ошибок
     for t in txs:
         if t.status == TransactionStatus.FAILED:
-            print(f"[FAIL] {t.tx_id}: {t.failure_reason}")
+            emit(f"[FAIL] {t.tx_id}: {t.failure_reason}")
 
     # Пользовательские сценарии для одного клиента (например, c1)
-    print("=== Сценарии клиента c1 ===")
+    emit("=== Сценарии клиента c1 ===")
     cid = "c1"
     cl = clients[cid]
-    print(f"Клиент: {cl.full_name} (статус: {cl.status.value})")
-    print("Счета клиента:")
-    for acc_id in cl.accounts:
-        acc = bank.accounts[acc_id]
+    emit(f"Клиент: {cl.full_name} (статус: {cl.status.value})")
+    emit("Счета клиента:")
+    for acc in bank.get_client_accounts(cid):
         info = acc.get_account_info()
-        print(f" - {acc.__class__.__name__} {acc.id}: {info['balance']:.2f} {info['currency']} ({info['status']})")
+        emit(f" - {acc.__class__.__name__} {acc.id}: {info['balance']:.2f} {info['currency']} ({info['status']})")
     # Простая "история": транзакции, где клиент выступал отправителем или получателем
-    print("История транзакций клиента c1:")
+    emit("История транзакций клиента c1:")
+    # Client.accounts уже множество: проверка участия — поиск в нём, без копии
+    acc_ids = cl.accounts
     for t in txs:
-        def acc_belongs(a: BankAccount | None) -> bool:
-            return a is not None and a.id in cl.accounts
-        if acc_belongs(getattr(t, 'sender', None)) or acc_belongs(getattr(t, 'recipient', None)):
-            print(f" * {t.tx_id}: {t.tx_type.value} {t.amount} {t.currency.value} -> {t.status.value}")
+        sender, recipient = t.sender, t.recipient
+        if (sender is not None and sender.id in acc_ids) or (recipient is not None and recipient.id in acc_ids):
+            emit(f" * {t.tx_id}: {t.tx_type.value} {t.amount} {t.currency.value} -> {t.status.value}")
 
     # Подозрительные операции из аудита (уровни WARNING/ERROR) и внутреннего лога банка
-    print("Подозрительные операции (аудит):")
-    for rec in audit.filter():
-        if rec.level.name in ("WARNING", "ERROR"):
-            print(f" - [{rec.level.value}] {rec.message} (extra={rec.extra})")
+    emit("Подозрительные операции (аудит):")
+    for rec in audit.get_suspicious_operations():
+        emit(f" - [{rec.level.value}] {rec.message} (extra={rec.extra})")
     if bank.suspicious_log:
-        print("Подозрительные события банка:")
+        emit("Подозрительные события банка:")
         for msg in bank.suspicious_log:
-            print(f" - {msg}")
+            emit(f" - {msg}")
 
     # Отчёты: топ-3 клиентов, статистика транзакций, общий баланс
-    print("=== Отчёты ===")
+    emit("=== Отчёты ===")
     ranking = bank.get_clients_ranking()[:3]
-    print("Топ-3 клиентов по суммарному балансу:")
+    emit("Топ-3 клиентов по суммарному балансу:")
     for i, (cid_rank, total) in enumerate(ranking, start=1):
         client_name = bank.clients[cid_rank].full_name
-        print(f" {i}. {client_name} — {total:.2f}")
+        emit(f" {i}. {client_name} — {total:.2f}")
 
-    print("Статистика транзакций:")
-    print(f" processed={processed}, failed={failed}, cancelled={cancelled}, pending={pending}")
+    emit("Статистика транзакций:")
+    emit(f" processed={processed}, failed={failed}, cancelled={cancelled}, pending={pending}")
 
     # Общий баланс по всем клиентам (без учёта валют, как и метод банка)
     total_bank = 0.0
     for cid_all, cl_all in bank.clients.items():
         total_bank += bank.get_total_balance(cid_all)
-    print(f"Общий баланс банка (сумма по всем счетам, без конвертации): {total_bank:.2f}")
+    emit(f"Общий баланс банка (сумма по всем счетам, без конвертации): {total_bank:.2f}")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def main() -> None:
@@ -5,21 +5,74 @@ ReportBuilder формирует текстовые/структурирован
 """
 from __future__ import annotations
 
-from dataclasses import asdict
+from dataclasses import asdict, fields, is_dataclass
+from datetime import date, datetime, time
+from enum import Enum
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 import json
 import csv
+import math
 import os
 
+from src.day1.model.abstract_account import CURRENCY_STR, STATUS_STR
 from src.day3.model.bank import Bank
 from src.day5.model.audit import AuditLog, AuditRecord
 
+# matplotlib импортируется только при первом построении графиков (импорт тяжёлый)
+_plt: Any = None
+_HAVE_MPL: Optional[bool] = None  # None — ещё не пробовали импортировать
+
+
+def _pyplot() -> Any:
+    """matplotlib.pyplot или None, если библиотека недоступна."""
+    global _plt, _HAVE_MPL
+    if _HAVE_MPL is None:
+        try:
+            import matplotlib.pyplot as plt
+            _plt, _HAVE_MPL = plt, True
+        except Exception:
+            _HAVE_MPL = False
+    return _plt
+
+
+# Быстрый JSON-кодировщик (необязательная зависимость)
 try:
-    import matplotlib.pyplot as plt
-    _HAVE_MPL = True
+    import orjson
+    _HAVE_ORJSON = True
 except Exception:
-    plt = None
-    _HAVE_MPL = False
+    orjson = None
+    _HAVE_ORJSON = False
+
+
+def _json_key(key: Any) -> Any:
+    """Ключ словаря для стандартного json — как его пишет orjson с OPT_NON_STR_KEYS."""
+    if isinstance(key, Enum):
+        return key.value
+    if isinstance(key, (datetime, date, time)):
+        return key.isoformat()
+    return key
+
+
+def _jsonable(value: Any) -> Any:
+    """Приводит данные к виду, который стандартный json кодирует так же, как orjson:
+    Enum — значение, datetime/date/time — isoformat, dataclass — словарь полей,
+    NaN и ±inf — null, ключи-Enum и ключи-даты — строки. Остальное json решает сам.
+    """
+    if isinstance(value, Enum):
+        return _jsonable(value.value)
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (str, int)):
+        return value
+    if isinstance(value, dict):
+        return {_json_key(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if is_dataclass(value) and not isinstance(value, type):
+        return {f.name: _jsonable(getattr(value, f.name)) for f in fields(value)}
+    return value
 
 
 class ReportBuilder:
@@ -35,13 +88,7 @@ class ReportBuilder:
         client = self.bank.clients.get(client_id)
         if not client:
             raise KeyError("Клиент не найден")
-        accounts: List[Dict[str, Any]] = []
-        for acc_id in client.accounts:
-            acc = self.bank.accounts.get(acc_id)
-            if not acc:
-                continue
-            info = acc.get_account_info()
-            accounts.append(info)
+        accounts: List[Dict[str, Any]] = [acc.get_account_info() for acc in self.bank.get_client_accounts(client_id)]
         total_balance = self.bank.get_total_balance(client_id)
         report = {
             "client_id": client.client_id,
@@ -54,16 +101,9 @@ class ReportBuilder:
 
     def build_bank_report(self) -> Dict[str, Any]:
         """Отчёт по банку: количество счетов по статусу, суммы по валютам, топ клиентов."""
-        # Считаем агрегаты
-        by_status: Dict[str, int] = {}
-        totals_per_currency: Dict[str, float] = {}
-        for acc in self.bank.accounts.values():
-            # по статусам
-            st = getattr(acc.status, "value", str(acc.status))
-            by_status[st] = by_status.get(st, 0) + 1
-            # по валютам
-            cur = getattr(acc.currency, "value", str(acc.currency))
-            totals_per_currency[cur] = totals_per_currency.get(cur, 0.0) + float(acc._balance)
+        # Агрегаты считает банк: по одному проходу по счетам на статусы и на валюты
+        by_status = {STATUS_STR[st]: n for st, n in self.bank.count_accounts_by_status().items()}
+        totals_per_currency = {CURRENCY_STR[cur]: total for cur, total in self.bank.totals_by_currency().items()}
         # рейтинг клиентов (top-3)
         ranking = self.bank.get_clients_ranking()
         top3 = ranking[:3]
@@ -105,29 +145,42 @@ class ReportBuilder:
         }
 
     @staticmethod
-    def export_to_json(data: Dict[str, Any], path: str) -> None:
-        """Экспорт словаря в JSON файл (UTF-8)."""
+    def export_to_json(data: Dict[str, Any], path: str, indent: Optional[int] = 2) -> None:
+        """Экспорт словаря в JSON файл (UTF-8). Если установлен orjson — кодируем им в один буфер.
+        indent=None — компактный вывод без пробелов (меньше байт для больших выгрузок).
+        Результат не зависит от наличия orjson: для стандартного json данные сначала
+        приводятся к тому же виду (Enum, даты, dataclass, NaN — см. _jsonable).
+        """
         os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # orjson умеет только отступ в 2 пробела или компактный вывод
+        if _HAVE_ORJSON and indent in (None, 2):
+            option = orjson.OPT_NON_STR_KEYS
+            if indent is not None:
+                option |= orjson.OPT_INDENT_2
+            try:
+                buf = orjson.dumps(data, option=option)
+            except TypeError:
+                # Тип, который orjson не умеет (например, очень большое int), — стандартный json
+                buf = None
+            if buf is not None:
+                with open(path, "wb") as f:
+                    f.write(buf)
+                return
+        separators = (",", ":") if indent is None else None
         with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            json.dump(_jsonable(data), f, ensure_ascii=False, indent=indent, separators=separators)
 
     @staticmethod
     def export_to_csv(rows: Sequence[Dict[str, Any]], path: str) -> None:
         """Экспорт списка словарей в CSV. Поля берём по объединению всех ключей."""
         os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-        # Собираем набор всех ключей
-        headers: List[str] = []
-        seen = set()
-        for row in rows:
-            for k in row.keys():
-                if k not in seen:
-                    headers.append(k)
-                    seen.add(k)
+        # Собираем все ключи в порядке первого появления
+        headers: List[str] = list(dict.fromkeys(k for row in rows for k in row))
         with open(path, "w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-            for row in rows:
-                writer.writerow(row)
+            # Строки — сразу списками по фиксированному порядку колонок (без DictWriter на каждую строку)
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows([[row.get(k, "") for k in headers] for row in rows])
 
     def save_charts(
         self,
@@ -146,22 +199,28 @@ class ReportBuilder:
         Возвращает список путей с сохранёнными изображениями. Если matplotlib недоступен — возвращает пустой список.
         """
         saved: List[str] = []
-        if not _HAVE_MPL:
+        # Нечего рисовать — не импортируем matplotlib и не создаём фигуру
+        if not (pie_accounts_by_status or bar_total_by_client or balance_timeseries):
+            return saved
+        plt = _pyplot()
+        if plt is None:
             return saved
         os.makedirs(output_dir, exist_ok=True)
+        # Одна фигура на все диаграммы: перед каждой очищаем оси и меняем размер
+        fig, ax = plt.subplots()
 
         # 1) Pie: аккаунты по статусам
         if pie_accounts_by_status:
             data = self.build_bank_report()["accounts_by_status"]
             labels = list(data.keys()) or ["n/a"]
             sizes = list(data.values()) or [1]
-            fig, ax = plt.subplots(figsize=(4, 4))  
+            ax.clear()
+            fig.set_size_inches(4, 4)
             ax.pie(sizes, labels=labels, autopct="%1.1f%%")  
             ax.set_title("Счета по статусам")  
             path = os.path.join(output_dir, "pie_accounts_by_status.png")
             fig.tight_layout()  
             fig.savefig(path)  
-            plt.close(fig)  
             saved.append(path)
 
         # 2) Bar: суммарные балансы по клиентам
@@ -169,7 +228,8 @@ class ReportBuilder:
             ranking = self.bank.get_clients_ranking()
             labels = [cid for cid, _ in ranking] or ["n/a"]
             values = [total for _, total in ranking] or [0.0]
-            fig, ax = plt.subplots(figsize=(5, 3))  
+            ax.clear()
+            fig.set_size_inches(5, 3)
             ax.bar(labels, values)  
             ax.set_title("Баланс по клиентам")  
             ax.set_xlabel("Клиент")  
@@ -177,14 +237,14 @@ class ReportBuilder:
             path = os.path.join(output_dir, "bar_total_by_client.png")
             fig.tight_layout()  
             fig.savefig(path)  
-            plt.close(fig)  
             saved.append(path)
 
         # 3) Line: движение баланса (кастомная серия)
         if balance_timeseries:
             x = [label for label, _ in balance_timeseries]
             y = [float(val) for _, val in balance_timeseries]
-            fig, ax = plt.subplots(figsize=(5, 3))  
+            ax.clear()
+            fig.set_size_inches(5, 3)
             ax.plot(x, y, marker="o")  
             ax.set_title("Движение баланса")  
             ax.set_xlabel("Период")  
@@ -192,7 +252,7 @@ class ReportBuilder:
             path = os.path.join(output_dir, "line_balance_timeseries.png")
             fig.tight_layout()  
             fig.savefig(path)  
-            plt.close(fig)  
             saved.append(path)
 
+        plt.close(fig)
         return saved
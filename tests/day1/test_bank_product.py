@@ -1,5 +1,6 @@
 """Тесты для банковского продукта (BankAccount)."""
 
+import os
 import re
 import pytest
 
@@ -25,6 +26,13 @@ def test_auto_short_uuid_generated():
     assert re.fullmatch(r"[0-9a-f]{8}", acc.id) is not None
 
 
+def test_auto_ids_unique_across_pool_refills():
+    # Больше размера одной пачки пула id
+    ids = [BankAccount(owner=make_owner()).id for _ in range(100)]
+    assert len(set(ids)) == 100
+    assert all(re.fullmatch(r"[0-9a-f]{8}", i) for i in ids)
+
+
 def test_deposit_withdraw_happy_path():
     acc = BankAccount(owner=make_owner(), balance=100.0, currency=Currency.RUB)
     acc.deposit(50)
@@ -100,3 +108,57 @@ def test_type_validation_in_constructor(bad_status, bad_currency):
     # Если передать неправильные типы статуса или валюты — должно упасть с InvalidOperationError
     with pytest.raises(InvalidOperationError):
         BankAccount(owner=make_owner(), status=bad_status, currency=bad_currency)
+
+
+def test_balance_kept_in_minor_units():
+    acc = BankAccount(owner=make_owner(), account_id="MINOR001", balance=0)
+    # С float 0.1 * 10 дало бы 0.9999999999999999
+    for _ in range(10):
+        acc.deposit(0.1)
+    assert acc.get_account_info()["balance"] == 1.0
+    assert "1.00 RUB" in str(acc)
+    # Сумма меньше копейки — некорректна
+    with pytest.raises(InvalidOperationError):
+        acc.deposit(0.004)
+
+
+def test_str_refreshed_after_state_change():
+    acc = BankAccount(owner=make_owner(), account_id="CACHE001", balance=10)
+    assert str(acc) is str(acc)
+    acc.withdraw(3)
+    assert "7.00 RUB" in str(acc)
+    acc.status = AccountStatus.FROZEN
+    assert "frozen" in str(acc)
+
+
+@pytest.mark.parametrize("bad_amount", [float("inf"), float("nan"), 1e308, 10 ** 400])
+@pytest.mark.parametrize("op", ["deposit", "withdraw"])
+def test_non_finite_amount_raises_invalid_operation(bad_amount, op):
+    acc = BankAccount(owner=make_owner(), balance=100)
+    with pytest.raises(InvalidOperationError):
+        getattr(acc, op)(bad_amount)
+    assert acc.get_account_info()["balance"] == 100
+    with pytest.raises(InvalidOperationError):
+        BankAccount(owner=make_owner(), balance=bad_amount)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="нужен os.fork")
+def test_forked_child_does_not_reuse_parent_ids():
+    # Пул id уже заполнен в родителе; после fork дочерний процесс не должен раздавать те же id
+    BankAccount(owner=make_owner())
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # дочерний процесс
+        try:
+            os.close(read_fd)
+            ids = " ".join(BankAccount(owner=make_owner()).id for _ in range(5))
+            os.write(write_fd, ids.encode("ascii"))
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as f:
+        child_ids = set(f.read().decode("ascii").split())
+    os.waitpid(pid, 0)
+    parent_ids = {BankAccount(owner=make_owner()).id for _ in range(5)}
+    assert len(child_ids) == 5
+    assert not child_ids & parent_ids
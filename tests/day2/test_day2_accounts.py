@@ -85,3 +85,67 @@ def test_investment_projection_custom_rates_and_status():
     # В неактивном статусе роста нет
     acc.status = AccountStatus.FROZEN
     assert pytest.approx(acc.project_yearly_growth()) == 500
+
+
+def test_investment_projection_uses_subclass_default_rates():
+    class AggressiveAccount(InvestmentAccount):
+        __slots__ = ()
+        DEFAULT_RATES = {**InvestmentAccount.DEFAULT_RATES, "stocks": 0.20}
+
+    acc = AggressiveAccount(owner=owner(), balance=1000, portfolio={"stocks": 1.0})
+    # Быстрый путь без ставок и путь с переопределением других активов дают одно и то же
+    assert pytest.approx(acc.project_yearly_growth()) == 1200
+    assert pytest.approx(acc.project_yearly_growth({"bonds": 0.05})) == 1200
+    assert AggressiveAccount.rates_vector() == (0.20, 0.03, 0.06)
+
+
+def test_investment_set_portfolio_keeps_projection_in_sync():
+    acc = InvestmentAccount(owner=owner(), balance=1000, portfolio={"stocks": 1.0})
+    acc.set_portfolio({"bonds": 1.0})
+    assert acc.portfolio == {"stocks": 0.0, "bonds": 1.0, "etf": 0.0}
+    assert pytest.approx(acc.project_yearly_growth()) == 1030
+    # Некорректный портфель не меняет текущий
+    with pytest.raises(InvalidOperationError):
+        acc.set_portfolio({"stocks": 0.7, "etf": 0.7})
+    assert acc.portfolio["bonds"] == 1.0
+    assert pytest.approx(acc.project_yearly_growth()) == 1030
+    # Портфель меняется только через set_portfolio — прогноз не может устареть
+    with pytest.raises(TypeError):
+        acc.portfolio["stocks"] = 1.0
+    with pytest.raises(AttributeError):
+        acc.portfolio = {"stocks": 1.0}
+
+
+@pytest.mark.parametrize("cls", [SavingsAccount, PremiumAccount, InvestmentAccount])
+def test_accounts_have_no_instance_dict(cls):
+    acc = cls(owner=Owner(name="S", email="s@example.com"))
+    assert not hasattr(acc, "__dict__")
+    with pytest.raises(AttributeError):
+        acc.unexpected = 1
+
+
+def test_fast_withdraw_applies_same_rules_as_withdraw():
+    # Быстрый путь принимает сумму в минимальных единицах (копейках)
+    sav = SavingsAccount(owner=owner(), balance=1000, min_balance=200)
+    with pytest.raises(InsufficientFundsError):
+        sav._withdraw_fast(90_000)
+    sav._withdraw_fast(80_000)
+    assert sav.get_account_info()["balance"] == 200
+    prem = PremiumAccount(owner=owner(), balance=0, overdraft_limit=100, withdraw_fee_fixed=10)
+    prem._withdraw_fast(9_000)
+    assert prem.get_account_info()["balance"] == -100
+    with pytest.raises(InsufficientFundsError):
+        prem._withdraw_fast(100)
+    prem.status = AccountStatus.FROZEN
+    with pytest.raises(AccountFrozenError):
+        prem._deposit_fast(1_000)
+
+
+@pytest.mark.parametrize("cls", [SavingsAccount, PremiumAccount])
+@pytest.mark.parametrize("bad_amount", [float("inf"), float("nan"), 1e308])
+def test_non_finite_withdraw_same_error_for_all_types(cls, bad_amount):
+    acc = cls(owner=owner(), balance=100)
+    with pytest.raises(InvalidOperationError):
+        acc.withdraw(bad_amount)
+    with pytest.raises(InvalidOperationError):
+        acc.deposit(bad_amount)
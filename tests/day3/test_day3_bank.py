@@ -1,10 +1,14 @@
 from datetime import datetime
+import hashlib
 
 import pytest
 
 from src.day3.model.client import Client, ClientStatus
 from src.day3.model.bank import Bank
 from src.day1.model.abstract_account import AccountStatus, Currency
+from src.day1.model.bank_account import BankAccount
+from src.day2.model.investment_account import InvestmentAccount
+from src.day2.model.savings_account import SavingsAccount
 
 
 @pytest.fixture()
@@ -49,6 +53,7 @@ def test_authenticate_with_block_after_three_fails(bank: Bank, client_alex: Clie
     # 2-я неверная (клиент помечается подозрительным)
     assert bank.authenticate_client("c1", "nope") is False
     assert client_alex.suspicious is True
+    assert bank.has_suspicious("failed_logins")
     # 3-я неверная -> блок
     assert bank.authenticate_client("c1", "still") is False
     assert client_alex.status == ClientStatus.BLOCKED
@@ -56,6 +61,23 @@ def test_authenticate_with_block_after_three_fails(bank: Bank, client_alex: Clie
     assert bank.authenticate_client("c1", "pass") is False
 
 
+def test_password_stored_as_hash_and_fail_counter_reset(bank: Bank, client_alex: Client):
+    bank.add_client(client_alex, password="pass")
+    assert client_alex.password_hash and client_alex.password_hash != b"pass"
+    assert bank.authenticate_client("c1", "wrong") is False
+    assert client_alex.failed_logins == 1
+    assert bank.authenticate_client("c1", "pass") is True
+    assert client_alex.failed_logins == 0
+
+
+def test_custom_password_hasher(client_alex: Client):
+    bank = Bank(name="TestBank", password_hasher=lambda p: hashlib.sha256(p.encode("utf-8")).digest())
+    bank.add_client(client_alex, password="pass")
+    assert client_alex.password_hash == hashlib.sha256(b"pass").digest()
+    assert bank.authenticate_client("c1", "pass") is True
+    assert bank.authenticate_client("c1", "wrong") is False
+
+
 def test_freeze_unfreeze_close_account(bank: Bank, client_alex: Client):
     bank.add_client(client_alex, password="123")
     acc_id = bank.open_account("c1", account_type="basic", initial_balance=10)
@@ -96,17 +118,135 @@ def test_total_balance_and_ranking(bank: Bank, client_alex: Client, client_ivan:
     assert ranking[1][0] == "c2" and ranking[1][1] == 120
 
 
-def test_operations_forbidden_by_time_window(bank: Bank, client_alex: Client, monkeypatch):
-    bank.add_client(client_alex, password="a")
+def test_bank_built_through_constructor(client_alex: Client):
+    # Банк, собранный из полей dataclass, а не через add_client/open_account
+    acc = BankAccount(owner=client_alex.owner_view(), balance=100)
+    client_alex.add_account(acc.id)
+    bank = Bank(name="TestBank", clients={"c1": client_alex}, accounts={acc.id: acc})
+
+    assert bank.get_total_balance("c1") == 100
+    assert bank.get_clients_ranking() == [("c1", 100)]
+    assert bank.get_client_accounts("c1") == [acc]
+    assert bank.search_accounts(client_id="c1") == [acc.id]
+
+    # Счёт, добавленный напрямую, тоже учитывается
+    extra = BankAccount(owner=client_alex.owner_view(), balance=50)
+    bank.accounts[extra.id] = extra
+    client_alex.add_account(extra.id)
+    assert bank.get_total_balance("c1") == 150
+    assert bank.search_accounts(client_id="c1") == [acc.id, extra.id]
+    assert bank.search_accounts(owner_name_contains="петров") == [acc.id, extra.id]
 
-    # Подменяем текущее время на 02:30 — это запрещённый интервал
-    def fake_now() -> datetime:
-        return datetime(2025, 1, 1, 2, 30)
 
-    bank.current_time_provider = fake_now
+def test_operations_forbidden_by_time_window(client_alex: Client):
+    # Источник времени задаём при создании банка: 02:30 — это запрещённый интервал
+    bank = Bank(name="TestBank", current_time_provider=lambda: datetime(2025, 1, 1, 2, 30))
+    bank.add_client(client_alex, password="a")
 
     with pytest.raises(PermissionError):
         bank.open_account("c1", account_type="basic", initial_balance=10)
 
     # При этом в журнале фиксируется подозрительная активность
     assert any("запрещённое" in msg for msg in bank.suspicious_log)
+    assert bank.has_suspicious("forbidden_time")
+    assert not bank.has_suspicious("failed_logins")
+
+
+def test_project_all_investments_matches_per_account(bank: Bank, client_alex: Client):
+    bank.add_client(client_alex, password="a")
+    inv1 = bank.open_account("c1", account_type="investment", initial_balance=1000,
+                             portfolio={"stocks": 0.5, "bonds": 0.3, "etf": 0.2})
+    inv2 = bank.open_account("c1", account_type="investment", initial_balance=500,
+                             portfolio={"stocks": 1.0})
+    bank.open_account("c1", account_type="basic", initial_balance=100)
+    bank.freeze_account("c1", inv2)
+
+    projected = bank.project_all_investments({"stocks": 0.10})
+    # Только инвестиционные счета
+    assert set(projected) == {inv1, inv2}
+    assert projected[inv1] == pytest.approx(bank.accounts[inv1].project_yearly_growth({"stocks": 0.10}))
+    # Замороженный счёт не растёт
+    assert projected[inv2] == pytest.approx(500)
+    # Балансы не изменились
+    assert bank.accounts[inv1].get_account_info()["balance"] == pytest.approx(1000)
+
+    # Счёт, добавленный в банк напрямую, тоже попадает в прогноз
+    inv3 = InvestmentAccount(owner=client_alex.owner_view(), balance=100, portfolio={"stocks": 1.0})
+    bank.accounts[inv3.id] = inv3
+    assert bank.project_all_investments({"stocks": 0.10})[inv3.id] == pytest.approx(110)
+
+
+def test_search_accounts_by_indexes(bank: Bank, client_alex: Client, client_ivan: Client):
+    bank.add_client(client_alex, password="a")
+    bank.add_client(client_ivan, password="b")
+    a1 = bank.open_account("c1", account_type="basic", initial_balance=10)
+    a2 = bank.open_account("c1", account_type="basic", initial_balance=20)
+    i1 = bank.open_account("c2", account_type="basic", initial_balance=30)
+    bank.freeze_account("c1", a2)
+
+    # Результат — в порядке открытия счетов
+    assert bank.search_accounts() == [a1, a2, i1]
+    assert bank.search_accounts(client_id="c1") == [a1, a2]
+    assert bank.search_accounts(owner_name_contains="о") == [a1, a2, i1]
+    assert bank.search_accounts(owner_name_contains="иван") == [i1]
+    assert bank.search_accounts(client_id="c1", status=AccountStatus.FROZEN) == [a2]
+    assert bank.search_accounts(owner_name_contains="петров", status=AccountStatus.ACTIVE) == [a1]
+    assert bank.search_accounts(client_id="unknown") == []
+
+    # Закрытый счёт пропадает из выборки клиента, но находится по статусу
+    bank.close_account("c1", a1)
+    assert bank.search_accounts(client_id="c1") == [a2]
+    assert bank.search_accounts(status=AccountStatus.CLOSED) == [a1]
+    # Статус, изменённый напрямую у счёта, тоже учитывается
+    bank.accounts[i1].status = AccountStatus.FROZEN
+    assert bank.search_accounts(status=AccountStatus.FROZEN) == [a2, i1]
+    assert bank.search_accounts(owner_name_contains="иван", status=AccountStatus.ACTIVE) == []
+    assert bank.count_accounts_by_status() == {AccountStatus.CLOSED: 1, AccountStatus.FROZEN: 2}
+
+
+def test_apply_monthly_interest_all(bank: Bank, client_alex: Client):
+    bank.add_client(client_alex, password="a")
+    s1 = bank.open_account("c1", account_type="savings", initial_balance=1000, monthly_interest_rate=0.01)
+    s2 = bank.open_account("c1", account_type="savings", initial_balance=1000, monthly_interest_rate=0.02)
+    s3 = bank.open_account("c1", account_type="savings", initial_balance=1000)  # ставка 0
+    b1 = bank.open_account("c1", account_type="basic", initial_balance=1000)
+    bank.freeze_account("c1", s2)
+
+    assert bank.apply_monthly_interest_all() == 1
+    balances = {acc_id: bank.accounts[acc_id].get_account_info()["balance"] for acc_id in (s1, s2, s3, b1)}
+    assert balances[s1] == pytest.approx(1010)
+    assert balances[s2] == pytest.approx(1000)  # заморожен
+    assert balances[s3] == pytest.approx(1000)
+    assert balances[b1] == pytest.approx(1000)
+
+    # Счёт, добавленный в банк напрямую, тоже участвует в начислении
+    s4 = SavingsAccount(owner=client_alex.owner_view(), balance=100, monthly_interest_rate=0.1)
+    bank.accounts[s4.id] = s4
+    assert bank.apply_monthly_interest_all() == 2
+    assert s4.get_account_info()["balance"] == pytest.approx(110)
+
+
+def test_bulk_checks_time_window_once(bank: Bank, client_alex: Client):
+    bank.add_client(client_alex, password="a")
+    calls = []
+
+    def counting_now() -> datetime:
+        calls.append(1)
+        return datetime(2025, 1, 1, 12, 0)
+
+    bank.current_time_provider = counting_now
+    with bank.bulk():
+        for _ in range(5):
+            bank.open_account("c1", account_type="basic", initial_balance=1)
+    assert len(calls) == 1
+    assert len(bank.clients["c1"].accounts) == 5
+
+    # После выхода из блока проверка снова выполняется на каждую операцию
+    bank.open_account("c1", account_type="basic", initial_balance=1)
+    assert len(calls) == 2
+
+    # В запрещённое время пакет не открывается
+    bank.current_time_provider = lambda: datetime(2025, 1, 1, 2, 30)
+    with pytest.raises(PermissionError):
+        with bank.bulk():
+            pass
@@ -1,7 +1,8 @@
 """Тесты для Day4: система транзакций, очередь и процессор."""
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 
 import pytest
 
@@ -9,10 +10,13 @@ from src.day1.model.abstract_account import Owner, Currency, AccountStatus
 from src.day1.model.bank_account import BankAccount
 from src.day2.model.premium_account import PremiumAccount
 from src.day4.model.transaction import Transaction, TransactionType, TransactionStatus
-from src.day4.model.queue import TransactionQueue
+from src.day4.model.queue import ShardedTransactionQueue, TransactionQueue
 from src.day4.model.processor import TransactionProcessor, ProcessorConfig
+from src.day1.exeptions.exceptions import InvalidOperationError
 
 
+# Owner неизменяем — одинаковые владельцы переиспользуются
+@lru_cache(maxsize=None)
 def owner(name: str) -> Owner:
     return Owner(name=name, email=f"{name.lower()}@example.com")
 
@@ -82,13 +86,248 @@ def test_day4_full_flow():
     assert txs[5].status == TransactionStatus.FAILED
     assert any(word in (txs[5].failure_reason or "") for word in ["заморожен", "заморожен".capitalize()])
 
-    # Итоговые балансы
+    # Итоговые балансы (хранятся в копейках, поэтому сравниваем точно)
     # A: 1000 -100 +199 -52 -101 +50 -20 = 976 RUB
-    assert pytest.approx(acc_a.get_account_info()["balance"], rel=1e-6) == 976.0
+    assert acc_a.get_account_info()["balance"] == 976.0
     # B: 0 +1 +0.5 +299 = 300.5 USD
-    assert pytest.approx(acc_b.get_account_info()["balance"], rel=1e-6) == 300.5
+    assert acc_b.get_account_info()["balance"] == 300.5
     # P: 0 -50 +20 -11 = -41 RUB (овердрафт разрешён)
-    assert pytest.approx(acc_p.get_account_info()["balance"], rel=1e-6) == -41.0
+    assert acc_p.get_account_info()["balance"] == -41.0
 
     # Очередь опустела по готовым заданиям (pending нет)
     assert len(q.list_pending()) == 0
+
+    # Журнал ошибок: t5 и t6
+    assert [entry[0] for entry in proc.error_log] == ["t5", "t6"]
+    assert proc.formatted_errors[0].startswith("t5: InsufficientFundsError: ")
+
+
+def test_convert_uses_configured_rates():
+    proc = TransactionProcessor(TransactionQueue(), ProcessorConfig(rates={(Currency.USD, Currency.RUB): 90.0}))
+    assert proc.convert(2, Currency.USD, Currency.RUB) == 180.0
+    assert proc.convert(5, Currency.EUR, Currency.EUR) == 5
+    # Пары нет в таблице курсов
+    with pytest.raises(InvalidOperationError):
+        proc.convert(1, Currency.RUB, Currency.USD)
+
+
+def test_pop_ready_batch_order_and_skips():
+    now = datetime.now(timezone.utc)
+    q = TransactionQueue()
+    for tx_id, prio, delay in [("low", 1, 0), ("high", 5, 0), ("later", 9, 60), ("gone", 3, 0)]:
+        q.add(Transaction(tx_id=tx_id, tx_type=TransactionType.TRANSFER, amount=1, currency=Currency.RUB,
+                          sender=None, recipient=None, scheduled_at=now + timedelta(seconds=delay),
+                          priority=prio))
+    q.cancel("gone")
+    # Будущая транзакция остаётся в очереди, отменённая пропускается
+    assert [tx.tx_id for tx in q.pop_ready_batch(now)] == ["high", "low"]
+    assert [tx.tx_id for tx in q.pop_ready_batch(now + timedelta(minutes=5), max_n=1)] == ["later"]
+
+
+def test_queue_pending_tracking():
+    now = datetime.now(timezone.utc)
+    q = TransactionQueue()
+    for tx_id in ("a", "b", "c"):
+        q.add(Transaction(tx_id=tx_id, tx_type=TransactionType.TRANSFER, amount=1, currency=Currency.RUB,
+                          sender=None, recipient=None, scheduled_at=now))
+    assert len(q) == 3
+    q.cancel("b")
+    assert q.list_pending() == ["a", "c"]
+    tx = q.pop_ready(now)
+    assert tx.tx_id == "a" and len(q) == 1
+    # Повтор возвращает транзакцию в число ожидающих
+    q.requeue(tx)
+    assert sorted(q.list_pending()) == ["a", "c"]
+    q.on_tx_finalized("c")
+    assert q.list_pending() == ["a"]
+
+
+def test_cancelled_and_requeued_entries_are_skipped():
+    now = datetime.now(timezone.utc)
+    q = TransactionQueue()
+    txs = [Transaction(tx_id=f"t{i}", tx_type=TransactionType.TRANSFER, amount=1, currency=Currency.RUB,
+                       sender=None, recipient=None, scheduled_at=now) for i in range(10)]
+    for tx in txs:
+        q.add(tx)
+    # Повторная постановка ещё ожидающей транзакции: прежний элемент кучи больше не действует
+    q.requeue(txs[9], delay_seconds=60)
+    for i in range(8):
+        q.cancel(f"t{i}")
+    assert len(q) == 2
+    assert [tx.tx_id for tx in q.pop_ready_batch(now)] == ["t8"]
+    assert len(q) == 1
+    assert [tx.tx_id for tx in q.pop_ready_batch(now + timedelta(minutes=2))] == ["t9"]
+    assert len(q) == 0 and q.pop_ready_batch(now + timedelta(minutes=2)) == []
+
+
+def test_queue_rejects_naive_datetimes():
+    now = datetime.now(timezone.utc)
+    q = TransactionQueue()
+    # Время без часового пояса не угадываем (UTC или местное) — отклоняем явно
+    naive = Transaction(tx_id="n", tx_type=TransactionType.TRANSFER, amount=1, currency=Currency.RUB,
+                        sender=None, recipient=None, scheduled_at=datetime(2025, 1, 1, 12, 0))
+    with pytest.raises(ValueError):
+        q.add(naive)
+    assert len(q) == 0 and q.list_pending() == []
+    q.add(Transaction(tx_id="a", tx_type=TransactionType.TRANSFER, amount=1, currency=Currency.RUB,
+                      sender=None, recipient=None, scheduled_at=now))
+    with pytest.raises(ValueError):
+        q.pop_ready(now.replace(tzinfo=None))
+    with pytest.raises(ValueError):
+        q.pop_ready_batch(now.replace(tzinfo=None))
+    # Любой часовой пояс подходит: сравниваются абсолютные моменты времени
+    ahead = timezone(timedelta(hours=8))
+    assert [tx.tx_id for tx in q.pop_ready_batch(now.astimezone(ahead))] == ["a"]
+
+
+class _FlakyAccount:
+    """Получатель, зачисление на который всегда падает временной ошибкой."""
+    status = AccountStatus.ACTIVE
+    currency = Currency.RUB
+
+    def _deposit_fast(self, value: int) -> None:
+        raise RuntimeError("timeout")
+
+
+def test_retry_backoff_is_exponential():
+    q = TransactionQueue()
+    cfg = ProcessorConfig(max_retries=3, retry_base_delay=10.0, retry_max_delay=30.0, retry_jitter=0.0)
+    proc = TransactionProcessor(q, cfg)
+    tx = Transaction(tx_id="r1", tx_type=TransactionType.TRANSFER, amount=5, currency=Currency.RUB,
+                     sender=None, recipient=_FlakyAccount())
+    q.add(tx)
+    delays = []
+    far_future = datetime.now(timezone.utc) + timedelta(days=1)
+    while proc.process_next(far_future):
+        if tx.status == TransactionStatus.PENDING:
+            delays.append((tx.scheduled_at - datetime.now(timezone.utc)).total_seconds())
+    # 10, 20, затем ограничение 30; после max_retries — ошибка
+    assert [round(d) for d in delays] == [10, 20, 30]
+    assert tx.status == TransactionStatus.FAILED
+
+
+def test_transaction_timestamps_materialized_on_demand():
+    tx = Transaction(tx_id="ts1", tx_type=TransactionType.TRANSFER, amount=1, currency=Currency.RUB,
+                     sender=None, recipient=None)
+    assert tx.processed_at is None
+    tx.mark_processed(1_700_000_000.0)
+    assert tx.processed_at == datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc)
+    assert tx.updated_at == tx.processed_at
+    tx.updated_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert tx.updated_at_ts == datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def test_sharded_queue_keeps_per_sender_order():
+    now = datetime.now(timezone.utc)
+    senders = [BankAccount(owner=owner(f"S{i}"), balance=100.0) for i in range(6)]
+    sink = BankAccount(owner=owner("Sink"), balance=0.0)
+    q = ShardedTransactionQueue(n_shards=3)
+    proc = TransactionProcessor(q)
+    for i, acc in enumerate(senders):
+        for k in range(2):
+            q.add(Transaction(tx_id=f"s{i}-{k}", tx_type=TransactionType.TRANSFER, amount=10 + k,
+                              currency=Currency.RUB, sender=acc, recipient=sink, scheduled_at=now,
+                              priority=k))
+    assert len(q) == 12
+    # Все операции отправителя — в одном шарде
+    for acc in senders:
+        shard = q.shard_for(Transaction(tx_id="?", tx_type=TransactionType.TRANSFER, amount=1,
+                                        currency=Currency.RUB, sender=acc, recipient=None))
+        assert {f"s{senders.index(acc)}-0", f"s{senders.index(acc)}-1"} <= set(shard.list_pending())
+    assert q.cancel("s0-0")
+    proc.run_all(now)
+    assert len(q) == 0
+    assert sink.get_account_info()["balance"] == 6 * 11 + 5 * 10
+
+
+def test_sharded_queue_pops_in_single_queue_order():
+    now = datetime.now(timezone.utc)
+    senders = [BankAccount(owner=owner(f"S{i}"), balance=100.0) for i in range(8)]
+    specs = [(0, 5, 0), (1, 0, 0), (2, 0, 3), (3, 1, 1), (4, 0, 3), (5, 2, 0), (6, 0, 0), (7, 1, 5)]
+
+    def fill(q):
+        for i, minutes, priority in specs:
+            q.add(Transaction(tx_id=f"t{i}", tx_type=TransactionType.TRANSFER, amount=1, currency=Currency.RUB,
+                              sender=senders[i], recipient=None, priority=priority,
+                              scheduled_at=now - timedelta(minutes=minutes)))
+
+    single, sharded = TransactionQueue(), ShardedTransactionQueue(n_shards=3)
+    fill(single)
+    fill(sharded)
+    # Более раннее/приоритетное в одном шарде не ждёт, пока опустеет другой шард
+    assert sharded.pop_ready(now).tx_id == single.pop_ready(now).tx_id == "t0"
+    assert [tx.tx_id for tx in sharded.pop_ready_batch(now, 3)] == [tx.tx_id for tx in single.pop_ready_batch(now, 3)]
+    assert [tx.tx_id for tx in sharded.pop_ready_batch(now)] == [tx.tx_id for tx in single.pop_ready_batch(now)]
+    assert len(sharded) == 0
+
+
+def test_processor_config_is_shared_without_mutation():
+    cfg = ProcessorConfig(external_fee_fixed=2.0)
+    p1 = TransactionProcessor(TransactionQueue(), cfg)
+    p2 = TransactionProcessor(TransactionQueue(), cfg)
+    # Дефолтные курсы попадают в копию настроек процессора, исходный объект не меняется
+    assert cfg.rates == {}
+    assert p1.config.rates and p1.config.rates == p2.config.rates
+    assert p1.config.external_fee_fixed == 2.0
+    with pytest.raises(AttributeError):
+        cfg.max_retries = 5
+
+
+def test_transfer_legs_below_minor_unit_do_not_lose_money():
+    now = datetime.now(timezone.utc)
+    proc = TransactionProcessor(TransactionQueue())
+    # Комиссия 1 KZT = 0.0021 USD округляется до нуля — не списывается, перевод проходит
+    usd = BankAccount(owner=owner("Usd"), balance=100.0, currency=Currency.USD)
+    kzt = BankAccount(owner=owner("Kzt"), balance=0.0, currency=Currency.KZT)
+    t1 = Transaction(tx_id="m1", tx_type=TransactionType.TRANSFER, amount=100, currency=Currency.KZT,
+                     sender=usd, recipient=kzt, fee_fixed=1, scheduled_at=now)
+    proc.queue.add(t1)
+    proc.run_all(now)
+    assert t1.status == TransactionStatus.PROCESSED
+    assert usd.get_account_info()["balance"] == 99.79
+    assert kzt.get_account_info()["balance"] == 100.0
+    # Зачисление 1 KZT = 0.0021 USD меньше цента — отказ до списания, балансы не меняются
+    t2 = Transaction(tx_id="m2", tx_type=TransactionType.TRANSFER, amount=1, currency=Currency.KZT,
+                     sender=kzt, recipient=usd, scheduled_at=now)
+    proc.queue.add(t2)
+    proc.run_all(now)
+    assert t2.status == TransactionStatus.FAILED
+    assert kzt.get_account_info()["balance"] == 100.0
+    assert usd.get_account_info()["balance"] == 99.79
+
+
+def test_failed_credit_restores_sender_balance():
+    sender = BankAccount(owner=owner("Src"), balance=50.0)
+    proc = TransactionProcessor(TransactionQueue(), ProcessorConfig(max_retries=0))
+    tx = Transaction(tx_id="rb1", tx_type=TransactionType.TRANSFER, amount=20, currency=Currency.RUB,
+                     sender=sender, recipient=_FlakyAccount())
+    proc.queue.add(tx)
+    proc.run_all(datetime.now(timezone.utc) + timedelta(seconds=1))
+    assert tx.status == TransactionStatus.FAILED
+    assert sender.get_account_info()["balance"] == 50.0
+
+
+@pytest.mark.parametrize("bad_amount", [float("inf"), float("nan"), 10 ** 400])
+def test_non_finite_amount_fails_without_retry(bad_amount):
+    acc = BankAccount(owner=owner("Inf"), balance=10.0)
+    proc = TransactionProcessor(TransactionQueue())
+    tx = Transaction(tx_id="inf1", tx_type=TransactionType.TRANSFER, amount=bad_amount, currency=Currency.RUB,
+                     sender=None, recipient=acc)
+    proc.queue.add(tx)
+    proc.run_all(datetime.now(timezone.utc) + timedelta(seconds=1))
+    assert tx.status == TransactionStatus.FAILED
+    assert tx.attempts == 0
+    assert proc.error_log[0][1] == "InvalidOperationError"
+
+
+def test_processor_rates_cannot_drift_from_rate_matrix():
+    rates = {(Currency.USD, Currency.RUB): 90.0}
+    proc = TransactionProcessor(TransactionQueue(), ProcessorConfig(rates=rates))
+    # Изменение исходного словаря не влияет на процессор, а его копия неизменяема
+    rates[(Currency.USD, Currency.RUB)] = 1.0
+    assert proc.convert(1.0, Currency.USD, Currency.RUB) == 90.0
+    with pytest.raises(TypeError):
+        proc.config.rates[(Currency.USD, Currency.RUB)] = 1.0
+    # Новые настройки — новая матрица
+    proc.config = ProcessorConfig(rates={(Currency.USD, Currency.RUB): 95.0})
+    assert proc.convert(1.0, Currency.USD, Currency.RUB) == 95.0
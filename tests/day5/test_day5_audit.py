@@ -3,7 +3,9 @@
 """
 from __future__ import annotations
 
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, time, timezone, timedelta
+from functools import lru_cache
+import json
 import os
 
 import pytest
@@ -14,7 +16,7 @@ from src.day2.model.premium_account import PremiumAccount
 from src.day4.model.queue import TransactionQueue
 from src.day4.model.transaction import Transaction, TransactionType
 from src.day4.model.processor import TransactionProcessor, ProcessorConfig
-from src.day5.model.audit import AuditLog, RiskAnalyzer, RiskConfig, RiskLevel, AuditLevel
+from src.day5.model.audit import AuditLog, AuditRecord, RiskAnalyzer, RiskConfig, RiskLevel, AuditLevel
 
 
 @pytest.fixture()
@@ -22,6 +24,8 @@ def now() -> datetime:
     return datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
 
 
+# Owner неизменяем — одинаковые владельцы переиспользуются
+@lru_cache(maxsize=None)
 def owner(name: str) -> Owner:
     return Owner(name=name, email=f"{name.lower()}@ex.com")
 
@@ -144,3 +148,116 @@ def test_audit_reports_and_file_save(tmp_path):
     with open(file_path, "r", encoding="utf-8") as f:
         content = f.read()
         assert "warning" in content and "error" in content
+
+
+def test_frequency_window_slides(now: datetime):
+    risk = RiskAnalyzer(RiskConfig(frequency_window_seconds=60, frequency_limit=3))
+    a = BankAccount(owner=owner("A"), balance=100, currency=Currency.RUB)
+    b = BankAccount(owner=owner("B"), balance=0, currency=Currency.RUB)
+
+    def freq(dt: datetime) -> bool:
+        _, reasons, _ = risk.assess(amount=1, currency=Currency.RUB, sender=a, recipient=b, now=dt)
+        return "частые операции" in reasons
+
+    assert not freq(now)
+    assert not freq(now + timedelta(seconds=30))
+    assert freq(now + timedelta(seconds=50))
+    # Первая операция вышла из окна — в окне снова только две
+    assert not freq(now + timedelta(seconds=100))
+
+
+def test_repeated_low_assessments_get_independent_extra(now: datetime):
+    risk = RiskAnalyzer()
+    a = BankAccount(owner=owner("A"), balance=100, currency=Currency.RUB)
+    b = BankAccount(owner=owner("B"), balance=0, currency=Currency.RUB)
+    results = [risk.assess(amount=10, currency=Currency.RUB, sender=a, recipient=b,
+                           now=now + timedelta(minutes=5 * i)) for i in range(3)]
+    # Первый перевод — новый получатель, дальше LOW
+    assert [r[0] for r in results] == [RiskLevel.MEDIUM, RiskLevel.LOW, RiskLevel.LOW]
+    assert results[2][2]["risk_level"] == "low" and results[2][2]["recipient_id"] == b.id
+    # Каждая оценка отдаёт свой extra: изменение одного не задевает другие записи
+    results[1][2]["amount"] = -1
+    assert results[2][2]["amount"] == 10.0
+
+
+def test_night_window_bounds_and_wraparound():
+    risk = RiskAnalyzer()
+    day = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert risk._is_night(day.replace(hour=4, minute=59, second=59))
+    assert not risk._is_night(day.replace(hour=5))
+    wrap = RiskAnalyzer(RiskConfig(night_from=time(22, 0), night_to=time(5, 0)))
+    assert wrap._is_night(day.replace(hour=23)) and wrap._is_night(day.replace(hour=1))
+    assert not wrap._is_night(day.replace(hour=12))
+
+
+def test_audit_appends_jsonl(tmp_path):
+    path = os.path.join(tmp_path, "audit.jsonl")
+    audit = AuditLog(path=path, flush_every=2)
+    audit.info("первая", owner_name="A")
+    audit.error("вторая: сбой", tx_id="T1")
+    # Две записи — буфер уже сброшен
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [(d["lvl"], d["msg"]) for d in lines] == [("info", "первая"), ("error", "вторая: сбой")]
+    assert lines[1]["tx_id"] == "T1"
+    audit.warning("третья")
+    audit.close()
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+
+
+def test_audit_extend_matches_add(tmp_path):
+    path = os.path.join(tmp_path, "audit.jsonl")
+    audit = AuditLog(path=path)
+    audit.extend([
+        AuditRecord(level=AuditLevel.INFO, message="ок"),
+        AuditRecord(level=AuditLevel.WARNING, message="внимание", extra={"owner_name": "A"}),
+    ])
+    assert [r.message for r in audit.records] == ["ок", "внимание"]
+    assert [r.message for r in audit.get_suspicious_operations()] == ["внимание"]
+    # Фильтр по уровню и статистика ошибок одинаковы для add и extend
+    audit.error("сбой: A")
+    audit.extend([AuditRecord(level=AuditLevel.ERROR, message="сбой: B")])
+    assert [r.message for r in audit.filter(level=AuditLevel.ERROR)] == ["сбой: A", "сбой: B"]
+    assert audit.get_error_statistics() == {"сбой": 2}
+    audit.close()
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["msg"] for line in f] == ["ок", "внимание", "сбой: A", "сбой: B"]
+
+
+def test_audit_records_are_read_only():
+    audit = AuditLog()
+    audit.info("ок")
+    audit.warning("внимание")
+    # Журнал меняется только через add/extend, поэтому фильтры и отчёты с ним не расходятся
+    with pytest.raises(AttributeError):
+        audit.records.append(AuditRecord(level=AuditLevel.ERROR, message="сбой: X"))
+    with pytest.raises(AttributeError):
+        audit.records = []
+    assert [r.message for r in audit.records] == ["ок", "внимание"]
+    assert [r.message for r in audit.filter(level=AuditLevel.INFO)] == ["ок"]
+    assert [r.message for r in audit.filter(level=AuditLevel.WARNING)] == ["внимание"]
+    assert [r.message for r in audit.get_suspicious_operations()] == ["внимание"]
+
+
+def test_audit_context_manager_closes_file_on_error(tmp_path):
+    path = os.path.join(tmp_path, "audit.jsonl")
+    with pytest.raises(RuntimeError):
+        with AuditLog(path=path) as audit:
+            audit.warning("до сбоя")
+            raise RuntimeError("сбой")
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["msg"] for line in f] == ["до сбоя"]
+
+
+def test_risk_thresholds_follow_config(now: datetime):
+    thresholds = {Currency.RUB: 1_000.0}
+    risk = RiskAnalyzer(RiskConfig(large_amount_threshold=thresholds))
+    thresholds[Currency.RUB] = 1.0
+    with pytest.raises(TypeError):
+        risk.config.large_amount_threshold[Currency.RUB] = 1.0
+    level, reasons, _ = risk.assess(amount=500, currency=Currency.RUB, sender=None, recipient=None, now=now)
+    assert "крупная сумма" not in reasons
+    risk.config = RiskConfig(large_amount_threshold={Currency.RUB: 100.0})
+    level, reasons, _ = risk.assess(amount=500, currency=Currency.RUB, sender=None, recipient=None, now=now)
+    assert level is RiskLevel.HIGH and "крупная сумма" in reasons
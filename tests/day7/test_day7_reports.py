@@ -1,21 +1,25 @@
 """Тесты для Day7: отчётность и визуализация."""
 from __future__ import annotations
 
+import copy
 import json
 import os
+from datetime import datetime, timezone
 
 import pytest
 
-from src.day1.model.abstract_account import Owner, Currency
+from src.day1.model.abstract_account import AccountStatus, Owner, Currency
 from src.day1.model.bank_account import BankAccount
 from src.day2.model.savings_account import SavingsAccount
 from src.day3.model.bank import Bank
-from src.day5.model.audit import AuditLog, AuditLevel
+from src.day5.model.audit import AuditLog, AuditLevel, AuditRecord
+from src.day7.model import report as report_module
 from src.day7.model.report import ReportBuilder
 
 
-@pytest.fixture()
-def bank_with_data() -> Bank:
+@pytest.fixture(scope="session")
+def _bank_with_data_template() -> Bank:
+    # Собираем банк один раз за сессию; тестам отдаём копии (см. bank_with_data)
     bank = Bank(name="ReportBank")
     # Добавим двух клиентов
     from src.day3.model.client import Client
@@ -31,6 +35,11 @@ def bank_with_data() -> Bank:
     return bank
 
 
+@pytest.fixture()
+def bank_with_data(_bank_with_data_template: Bank) -> Bank:
+    return copy.deepcopy(_bank_with_data_template)
+
+
 @pytest.fixture()
 def audit_sample() -> AuditLog:
     audit = AuditLog()
@@ -56,6 +65,8 @@ def test_build_client_and_bank_reports(bank_with_data: Bank, audit_sample: Audit
     assert isinstance(bank_report["accounts_by_status"], dict)
     assert isinstance(bank_report["totals_per_currency"], dict)
     assert isinstance(bank_report["top_clients"], list)
+    assert bank_report["accounts_by_status"] == {"active": 4}
+    assert bank_report["totals_per_currency"] == {"RUB": 400.0, "USD": 200.0}
 
     # Рисковый отчёт
     risk_report = rb.build_risk_report()
@@ -80,6 +91,14 @@ def test_build_client_and_bank_reports(bank_with_data: Bank, audit_sample: Audit
         assert "level" in content and "message" in content
 
 
+def test_bank_report_for_bank_built_through_constructor():
+    # Статусы и суммы по валютам согласованы и для банка, собранного из полей dataclass
+    acc = BankAccount(owner=Owner(name="Алексей", email="a@ex.com"), balance=100, currency=Currency.EUR)
+    report = ReportBuilder(Bank(name="B", accounts={acc.id: acc})).build_bank_report()
+    assert report["accounts_by_status"] == {"active": 1}
+    assert report["totals_per_currency"] == {"EUR": 100.0}
+
+
 def test_save_charts_handles_matplotlib_absence(bank_with_data: Bank, audit_sample: AuditLog, tmp_path):
     rb = ReportBuilder(bank_with_data, audit_sample)
     # Простая временная серия для графика движения баланса
@@ -91,3 +110,54 @@ def test_save_charts_handles_matplotlib_absence(bank_with_data: Bank, audit_samp
             assert os.path.exists(p)
     else:
         assert saved == []
+
+
+def test_export_to_json_handles_values_beyond_fast_encoder(tmp_path):
+    path = os.path.join(tmp_path, "big.json")
+    data = {"имя": "Пётр", "big": 2 ** 70, "items": [1, 2.5]}
+    ReportBuilder.export_to_json(data, path)
+    with open(path, "r", encoding="utf-8") as f:
+        assert json.load(f) == data
+
+
+def test_export_to_json_same_with_and_without_orjson(tmp_path, monkeypatch):
+    data = {
+        "status": AccountStatus.FROZEN,
+        "at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "record": AuditRecord(level=AuditLevel.ERROR, message="сбой",
+                              timestamp=datetime(2024, 1, 2, tzinfo=timezone.utc), extra={"n": 1}),
+        "by_currency": {Currency.RUB: 1.5},
+        "nan": float("nan"),
+    }
+    expected = {
+        "status": "frozen",
+        "at": "2024-01-02T03:04:05+00:00",
+        "record": {"level": "error", "message": "сбой", "timestamp": "2024-01-02T00:00:00+00:00", "extra": {"n": 1}},
+        "by_currency": {"RUB": 1.5},
+        "nan": None,
+    }
+    for have_orjson in (report_module._HAVE_ORJSON, False):
+        monkeypatch.setattr(report_module, "_HAVE_ORJSON", have_orjson)
+        for indent in (2, None, 4):
+            path = os.path.join(tmp_path, f"data_{have_orjson}_{indent}.json")
+            ReportBuilder.export_to_json(data, path, indent=indent)
+            with open(path, "r", encoding="utf-8") as f:
+                assert json.load(f) == expected
+
+
+def test_export_to_csv_unions_keys_in_first_seen_order(tmp_path):
+    path = os.path.join(tmp_path, "rows.csv")
+    ReportBuilder.export_to_csv([{"a": 1, "b": 2}, {"c": 3, "a": 4}], path)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        assert f.read().splitlines() == ["a,b,c", "1,2,", "4,,3"]
+
+
+# Второй набор не кодируется orjson и проверяет стандартный json
+@pytest.mark.parametrize("data", [{"имя": "Пётр", "items": [1, 2.5]}, {"имя": "Пётр", "big": 2 ** 70}])
+def test_export_to_json_compact(tmp_path, data):
+    path = os.path.join(tmp_path, "compact.json")
+    ReportBuilder.export_to_json(data, path, indent=None)
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    assert "\n" not in text and ", " not in text
+    assert json.loads(text) == data